@@ -49,6 +49,8 @@
 # MAGIC %md
 # MAGIC ## Importação de Biblioteas
 # MAGIC Inicialmente, iremos importar e avaliar (utilizando a biblioteca Pandas, para fazer uma rápida análise exploratória) os dataset de "entrada", variáveis explicativas para a obtenção do CMO: ENA, EArm e Demanda, nesta ordem.
+# MAGIC
+# MAGIC > O mesmo fluxo deste notebook pode ser executado fora do Databricks, como um job agendado, para um subconjunto de grandezas ou de anos: `python -m ons_dados refresh --datasets ena,ear,carga --since 2015 --workers 16 --parquet <diretório>` (com `--spark` para a carga no Hive). Em outro notebook, `ons_dados.pipeline.atualizar(..., spark=spark)` executa a atualização reutilizando a sessão Spark existente.
 
 # COMMAND ----------
 
@@ -57,12 +59,26 @@
 import warnings
 warnings.filterwarnings("ignore")
 #
-# Importando as bibliotecas pandas, matplotlib (pyplot), seaborn e datetime
+# Importando a biblioteca pandas
+# (matplotlib e seaborn não são usados na obtenção e no tratamento; importar apenas nas células de gráficos)
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import datetime
-import numpy as np
+#
+# Módulo local com o download paralelo (e o cache em disco) dos arquivos anuais do ONS
+from ons_dados.cache import CacheArquivos
+from ons_dados.download import baixar_anos, montar_dataset, resumo_downloads
+from ons_dados.revisoes import detectar_alteracoes
+from ons_dados.agregados import atualizar_agregados
+from ons_dados.armazenamento import gravar_parquet, ler_parquet
+from ons_dados.cmo import alinhar_cmo
+from ons_dados.consolidacao import montar_tabela_diaria, sql_diaria
+from ons_dados.consulta import Consulta
+from ons_dados.esquemas import validar_contrato
+from ons_dados.metricas import Metricas
+from ons_dados.pipeline import ano_vigente
+from ons_dados.tratamento import tratar
+from ons_dados.spark_ingestao import caminhos_cache, ler_dataset_spark
+from ons_dados.streaming import blocos_dataset, gravar_blocos_parquet
+from ons_dados.warehouse import carregar_tabela, inserir_tabela
 
 # COMMAND ----------
 
@@ -84,23 +100,34 @@ import numpy as np
 # ENA - Arquivos com os dados anuais, com histórico desde 2001
 ano_zero=2001
 ano_inicio=ano_zero+1
-data_fim=datetime.datetime.now() - datetime.timedelta(days=5) #ano vigente, considerando um possível atraso de até 5 dias na publicação, o que é comum na virada de ano
-ano_fim=data_fim.strftime("%Y")
-ano_fim=int(ano_fim)
-print(data_fim)
+ano_fim=ano_vigente(atraso_dias=5) #ano vigente, considerando um possível atraso de até 5 dias na publicação, o que é comum na virada de ano
 print(ano_fim)
 
 # COMMAND ----------
 
+# Baixando, em paralelo, todos os arquivos anuais de ENA, EAR, Carga e CMO (com até 3 tentativas por arquivo)
+# O tempo total passa a ser limitado pelo arquivo mais lento, e não pela soma de todos os downloads
+# Os anos fechados raramente mudam: ficam no cache em disco e só o ano vigente é revalidado junto ao ONS (ETag/Last-Modified)
+# Para conferir também os anos fechados (ex.: após uma reconsistência do ONS), usar revalidar_fechados=True
+# metricas registra tempo, bytes, linhas e memória de cada etapa da execução (download, leitura, tratamento e carga)
+metricas = Metricas()
+cache_ons = CacheArquivos("/dbfs/FileStore/sprintiii_isabelanatal/cache_ons")
+arquivos = baixar_anos(["ena", "ear", "carga", "cmo"], ano_zero, ano_fim, workers=16, cache=cache_ons, metricas=metricas)
+resumo_downloads(arquivos).head(10)
+
+# COMMAND ----------
+
+# Parâmetros de leitura dos .csv: tipos e formato de data fixos por dataset (ver ons_dados/esquemas.py)
+# engine_csv="pyarrow" usa o leitor multithread do Arrow; medidas_float32=True reduz pela metade a memória das colunas de medida
+engine_csv="pyarrow"
+medidas_float32=False
+
+# COMMAND ----------
+
 #Importando os dados da url para o dataframe, começando pelo ano inicial do histórico, até o ano vigente
 #Conforme dicionário de dados disponibilizado na página de Arquitetura Aberta do ONS, os arquivos .csv estão no formato UTF-8, com delimitador do tipo ponto-e-vírgula
-ena=pd.read_csv("https://ons-dl-prod-opendata.s3.amazonaws.com/dataset/ena_subsistema_di/ENA_DIARIO_SUBSISTEMA_"+str(ano_zero)+".csv",delimiter=";",encoding = 'utf8')
-ena=pd.DataFrame(ena)
-for ano in range (ano_inicio,ano_fim+1):
-    ano_str=str(ano)
-    ena_ano=pd.read_csv("https://ons-dl-prod-opendata.s3.amazonaws.com/dataset/ena_subsistema_di/ENA_DIARIO_SUBSISTEMA_"+ano_str+".csv",delimiter=";",encoding = 'utf8')
-    ena_ano=pd.DataFrame(ena_ano)
-    ena=pd.concat([ena,ena_ano])
+#Os anos são lidos em uma lista e concatenados uma única vez (concatenar dentro do laço copiaria o dataframe inteiro a cada ano)
+ena=montar_dataset(arquivos, "ena", ano_zero, ano_fim, medidas_float32, engine_csv, metricas)
 print(ena)
 
 # COMMAND ----------
@@ -120,30 +147,17 @@ ena.dtypes
 
 # COMMAND ----------
 
-# Iniciando o tratamento dos dados
-#Convertendo os nomes dos subsistemas para 1ª letra em maiúscula: SE->Sudeste; S->Sul; NE->Nordeste; N->Norte
-ena['nom_subsistema']=ena['nom_subsistema'].replace({'SUDESTE':'Sudeste',
-                                                'SUL':'Sul',
-                                                'NORDESTE':'Nordeste',
-                                                'NORTE':'Norte'})
-
-# COMMAND ----------
-
+# Iniciando o tratamento dos dados (etapas comuns às três grandezas, ver ons_dados/tratamento.py):
+# Convertendo os nomes dos subsistemas para 1ª letra em maiúscula: SE->Sudeste; S->Sul; NE->Nordeste; N->Norte
 # Renomeando a coluna de data e de subsistema, de modo a serem os mesmos nomes em todos os DataFrames/consultas, para facilitar a chave de mesclagem
-ena=ena.rename(columns = {'ena_data':'Data'})
-ena=ena.rename(columns = {'nom_subsistema':'Subsistema'})
+# A coluna "Data" já é convertida para datetime na leitura, com formato fixo (ver ons_dados/esquemas.py)
+ena=tratar(ena, "ena", metricas)
 print(ena)
 
 # COMMAND ----------
 
-# Alterando o tipo da coluna "Data"
-ena['Data'] = pd.to_datetime(ena['Data'])
-
-# COMMAND ----------
-
-# Reordenando o dataframe ena, pela coluna Data (em ordem decrescente)
-ena=ena.sort_values(by='Data', ascending=False)
-ena.head(20)
+# Conferindo os dias mais recentes do dataframe ena (que fica em ordem cronológica crescente)
+ena.iloc[::-1].head(20)
 
 # COMMAND ----------
 
@@ -172,13 +186,7 @@ ena.dtypes
 # Portanto, serão utilizados os mesmos parâmetros temporais base (que das demais grandezas)
 # Importando os dados da url para o dataframe, começando pelo ano inicial do histórico, até o ano vigente
 # Conforme dicionário de dados disponibilizado na página de Arquitetura Aberta do ONS, os arquivos .csv estão no formato UTF-8, com delimitador do tipo ponto-e-vírgula
-earm=pd.read_csv("https://ons-dl-prod-opendata.s3.amazonaws.com/dataset/ear_subsistema_di/EAR_DIARIO_SUBSISTEMA_"+str(ano_zero)+".csv",delimiter=";",encoding = 'utf8')
-earm=pd.DataFrame(earm)
-for ano in range (ano_inicio,ano_fim+1):
-    ano_str=str(ano)
-    earm_ano=pd.read_csv("https://ons-dl-prod-opendata.s3.amazonaws.com/dataset/ear_subsistema_di/EAR_DIARIO_SUBSISTEMA_"+ano_str+".csv",delimiter=";",encoding = 'utf8')
-    earm_ano=pd.DataFrame(earm_ano)
-    earm=pd.concat([earm,earm_ano])
+earm=montar_dataset(arquivos, "ear", ano_zero, ano_fim, medidas_float32, engine_csv, metricas)
 print (earm)
 
 # COMMAND ----------
@@ -198,30 +206,17 @@ earm.dtypes
 
 # COMMAND ----------
 
-# Iniciando o tratamento dos dados
-#Convertendo os nomes dos subsistemas para 1ª letra em maiúscula: SE->Sudeste; S->Sul; NE->Nordeste; N->Norte
-earm['nom_subsistema']=earm['nom_subsistema'].replace({'SUDESTE':'Sudeste',
-                                                'SUL':'Sul',
-                                                'NORDESTE':'Nordeste',
-                                                'NORTE':'Norte'})
-
-# COMMAND ----------
-
+# Iniciando o tratamento dos dados (etapas comuns às três grandezas, ver ons_dados/tratamento.py):
+# Convertendo os nomes dos subsistemas para 1ª letra em maiúscula: SE->Sudeste; S->Sul; NE->Nordeste; N->Norte
 # Renomeando a coluna de data e de subsistema, de modo a serem os mesmos nomes em todos os DataFrames/consultas, para facilitar a chave de mesclagem
-earm=earm.rename(columns = {'ear_data':'Data'})
-earm=earm.rename(columns = {'nom_subsistema':'Subsistema'})
+# A coluna "Data" já é convertida para datetime na leitura, com formato fixo (ver ons_dados/esquemas.py)
+earm=tratar(earm, "ear", metricas)
 print(earm)
 
 # COMMAND ----------
 
-# Alterando o tipo da coluna "Data"
-earm['Data'] = pd.to_datetime(earm['Data'])
-
-# COMMAND ----------
-
-# Reordenando o dataframe earm, pela coluna Data (em ordem decrescente)
-earm=earm.sort_values(by='Data', ascending=False)
-earm.head(20)
+# Conferindo os dias mais recentes do dataframe earm (que fica em ordem cronológica crescente)
+earm.iloc[::-1].head(20)
 
 # COMMAND ----------
 
@@ -248,20 +243,9 @@ earm.dtypes
 # Portanto, serão utilizados os mesmos parâmetros temporais base (que das demais grandezas)
 # Importando os dados da url para o dataframe, começando pelo ano inicial do histórico, até o ano vigente
 # Conforme dicionário de dados disponibilizado na página de Arquitetura Aberta do ONS, os arquivos .csv estão no formato UTF-8, com delimitador do tipo ponto-e-vírgula
-carga=pd.read_csv("https://ons-aws-prod-opendata.s3.amazonaws.com/dataset/carga_energia_di/CARGA_ENERGIA_"+str(ano_zero)+".csv",delimiter=";",encoding = 'utf8')
-carga=pd.DataFrame(carga)
-
-# COMMAND ----------
-
-# No dia da elaboração deste trabalho, a sintaxe da URL para o ano de 2023 (na nuvem) estava diferente dos demais anos:
-for ano in range (ano_inicio,ano_fim+1):
-    ano_str=str(ano)
-    if ano<ano_fim:
-        carga_ano=pd.read_csv("https://ons-aws-prod-opendata.s3.amazonaws.com/dataset/carga_energia_di/CARGA_ENERGIA_"+ano_str+".csv",delimiter=";",encoding = 'utf8')
-    else:
-        carga_ano=pd.read_csv(" https://ons-dl-prod-opendata.s3.amazonaws.com/dataset/carga_energia_di/CARGA_ENERGIA_"+ano_str+".csv",delimiter=";",encoding = 'utf8')        
-    carga_ano=pd.DataFrame(carga_ano)
-    carga=pd.concat([carga,carga_ano])
+# No dia da elaboração deste trabalho, a sintaxe da URL para o ano de 2023 (na nuvem) estava diferente dos demais anos
+# (o tratamento dessa diferença fica em ons_dados/fontes.py)
+carga=montar_dataset(arquivos, "carga", ano_zero, ano_fim, medidas_float32, engine_csv, metricas)
 print(carga)
 
 # COMMAND ----------
@@ -284,7 +268,7 @@ print(carganull)
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC >Constata-se, pela quantidade de dias, que o dataframe "carga" tem uma linha a mais que os dataframes "ena" e "earm". Ao mesclarmos as consultas, desejaremos excluir essa linha a mais.
+# MAGIC >Constata-se, pela quantidade de dias, que o dataframe "carga" tem uma linha a mais que os dataframes "ena" e "earm". Ao mesclarmos as consultas, desejaremos excluir essa linha a mais (ver Tabela Diária Consolidada, adiante).
 
 # COMMAND ----------
 
@@ -293,31 +277,22 @@ carga.dtypes
 
 # COMMAND ----------
 
-# Iniciando o tratamento dos dados
-# Convertendo os nomes dos subsistemas para 1ª letra em maiúscula: SE->Sudeste; S->Sul; NE->Nordeste; N->Norte
-carga['nom_subsistema']=carga['nom_subsistema'].replace({'Sudeste/Centro-Oeste':'Sudeste',
-                                                'SUL':'Sul',
-                                                'NORDESTE':'Nordeste',
-                                                'NORTE':'Norte'})
-
-# COMMAND ----------
-
-# Renomeando a coluna de data, de modo a ser o mesmo nome em todos os DataFrames, para facilitar a chave de mesclagem
-carga=carga.rename(columns = {'din_instante':'Data'})
-carga=carga.rename(columns = {'nom_subsistema':'Subsistema'})
+# Iniciando o tratamento dos dados (etapas comuns às três grandezas, ver ons_dados/tratamento.py):
+# Convertendo os nomes dos subsistemas: Sudeste/Centro-Oeste->Sudeste; SUL->Sul; NORDESTE->Nordeste; NORTE->Norte
+# Renomeando a coluna de data e de subsistema, de modo a ser o mesmo nome em todos os DataFrames, para facilitar a chave de mesclagem
+# Excluindo os dias sem valor de carga
+carga=tratar(carga, "carga", metricas)
 print(carga)
 
 # COMMAND ----------
 
-# Alterando o tipo da coluna "Data"
-carga['Data'] = pd.to_datetime(carga['Data'])
-carga = carga.dropna(subset=["val_cargaenergiamwmed"])
+# Conferindo os dias mais recentes do dataframe carga (que fica em ordem cronológica crescente)
+carga.iloc[::-1].head(20)
 
 # COMMAND ----------
 
-# Reordenando o dataframe carga, pela coluna Data (em ordem decrescente)
-carga=carga.sort_values(by='Data', ascending=False)
-carga.head(20)
+# Tempo, linhas e memória de cada etapa até aqui (download, leitura, conversão de data, concatenação e tratamento), por grandeza
+metricas.resumo()
 
 # COMMAND ----------
 
@@ -327,57 +302,199 @@ carga.dtypes
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC # Seção II: Spark e Hive
-# MAGIC > O Apache Spark é um mecanismo de análise unificada para código aberto em computação distribuída. Será utilizado no presente trabalho para o processamento de dados em grande escala, com módulos integrados para SQL e Python.
+# MAGIC ## Custo Marginal da Operação: CMO
+# MAGIC
+# MAGIC ***CMO SEMANAL POR SUBSISTEMA*** (Segundo o ONS)
+# MAGIC
+# MAGIC Dados do Custo Marginal de Operação (CMO) semanal por subsistema, em R$/MWh, nos patamares de carga leve, médio e pesado, além da média semanal. A data de referência é o início da semana operativa.
+# MAGIC
+# MAGIC O CMO é a base do Preço de Liquidação das Diferenças (PLD) e, portanto, a variável a ser explicada pelas grandezas de ENA, EAR e Carga.
 
 # COMMAND ----------
 
-# Criando os DataFrames relacionados à ENA, EAR e Carga, a partir dos DataFrames Pandas ena, earm e carga
-spark_ena = spark.createDataFrame(ena)
-spark_earm = spark.createDataFrame(earm)
-spark_carga = spark.createDataFrame(carga)
+# Seção I.4: Programa para obtenção do Custo Marginal da Operação - Dados Abertos Operador Nacional do Sistema Elétrico
+# CMO - Arquivos com os dados anuais, baixados junto com as demais grandezas (mesmos parâmetros temporais e mesmo cache)
+cmo=montar_dataset(arquivos, "cmo", ano_zero, ano_fim, medidas_float32, engine_csv, metricas)
+cmo=tratar(cmo, "cmo", metricas)
+cmo.iloc[::-1].head(12)
 
 # COMMAND ----------
 
-# Criando uma visualização temporária para cada query: DW_ENA; DW_EARM; DW_CARGA
-spark_ena.createOrReplaceTempView("DW_ENA")
-spark_earm.createOrReplaceTempView("DW_EARM")
-spark_carga.createOrReplaceTempView("DW_CARGA")
+# Conferindo a quantidade de semanas (considerando 4 subsistemas)
+len(cmo)/4
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DELETE FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_ENA
+# Alinhando o CMO semanal aos dados diários: cada dia recebe o CMO da semana operativa vigente no seu subsistema
+# A junção é feita "as of" sobre as datas ordenadas (merge_asof), sem replicar as semanas em dias
+ena_cmo=alinhar_cmo(ena, cmo)
+ena_cmo.iloc[::-1].head(20)
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DELETE FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_EARM
+# MAGIC %md
+# MAGIC ## Tabela Diária Consolidada
+# MAGIC ENA, EAR e Carga são mescladas em uma única tabela, indexada por (Subsistema, Data), em uma só junção pelo índice. Os dias que não existem nas três séries (como o dia a mais da Carga) são excluídos e listados. O CMO é acrescentado pela semana operativa vigente em cada dia. Com o índice ordenado, as consultas por subsistema e período passam a ser buscas diretas na tabela.
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DELETE FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_CARGA
+# Montando a tabela diária consolidada e conferindo os dias excluídos por não existirem em todas as séries
+tabela_diaria, dias_descartados = montar_tabela_diaria(ena, earm, carga, cmo)
+print(dias_descartados)
+tabela_diaria.tail(8)
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DROP TABLE IF EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_ENA
+# Exemplo de consulta: Sudeste, últimos 30 dias disponíveis
+tabela_diaria.loc["Sudeste"].tail(30)
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DROP TABLE IF EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_EARM
+# MAGIC %md
+# MAGIC ## Armazenamento Local em Parquet
+# MAGIC Os DataFrames tratados são gravados em Parquet, particionados por ano e subsistema. As análises seguintes podem partir desse armazenamento, lendo apenas o recorte de interesse (ex.: Sudeste, 2020 a 2023), sem baixar novamente os arquivos do ONS.
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DROP TABLE IF EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_CARGA
+# Gravando ena, earm e carga no armazenamento local (apenas as partições presentes nos DataFrames são substituídas)
+diretorio_parquet = "/dbfs/FileStore/sprintiii_isabelanatal/parquet"
+gravar_parquet(ena, "ena", diretorio_parquet)
+gravar_parquet(earm, "ear", diretorio_parquet)
+gravar_parquet(carga, "carga", diretorio_parquet)
+gravar_parquet(cmo, "cmo", diretorio_parquet)
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC DROP DATABASE IF EXISTS hive_metastore.sprintiii_isabelanatal
+# Alternativa para séries horárias ou históricos muito longos: ingestão em blocos, direto do cache em disco para o Parquet,
+# sem materializar o histórico inteiro em memória (o pico de memória depende apenas de linhas_bloco).
+# A curva de carga horária ("carga_horaria") mantém a hora na coluna Data e vai para a tabela DWTABLE_CARGA_HORARIA
+ingestao_em_blocos = False
+if ingestao_em_blocos:
+    for dataset in ["ena", "ear", "carga", "cmo"]:
+        gravar_blocos_parquet(blocos_dataset(dataset, ano_zero, ano_fim, linhas_bloco=100_000, cache=cache_ons, metricas=metricas),
+                              dataset, diretorio_parquet)
+
+# COMMAND ----------
+
+# Exemplo de leitura de um recorte: apenas as partições e row groups necessários são lidos
+ena_sudeste = ler_parquet("ena", diretorio_parquet, subsistemas=["Sudeste"], data_inicio="2020-01-01", data_fim="2023-12-31")
+ena_sudeste.head(10)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Revisões dos Dados pelo ONS
+# MAGIC Como os dados do ONS "fazem parte de um processo de consistência recorrente e podem ser atualizados após a sua publicação", cada atualização é comparada à anterior. Cada linha tem um hash dos seus valores e cada grupo (grandeza, ano, subsistema) tem uma impressão digital; apenas os grupos cuja impressão mudou são comparados linha a linha. As inclusões, revisões e exclusões encontradas formam o registro de alterações (DWTABLE_ALTERACOES).
+
+# COMMAND ----------
+
+# Detectando as linhas incluídas, revisadas ou excluídas pelo ONS desde a última atualização
+alteracoes = pd.concat([detectar_alteracoes(df, dataset, diretorio_parquet)
+                        for dataset, df in [("ena", ena), ("ear", earm), ("carga", carga), ("cmo", cmo)]],
+                       ignore_index=True)
+alteracoes.groupby(["dataset", "tipo"]).size()
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Agregados: Médias Móveis, Variação Anual e Resumo Mensal
+# MAGIC As médias móveis de 7, 30 e 90 dias, a variação em relação ao mesmo dia do ano anterior e a média, mínimo e máximo mensais de cada grandeza, por subsistema, são calculados uma única vez e gravados junto aos demais dados. A cada atualização, a tabela diária é comparada à versão gravada e apenas o trecho a partir do primeiro dia novo ou revisado é recalculado.
+
+# COMMAND ----------
+
+# Atualizando a tabela diária e os agregados no armazenamento local (apenas o trecho alterado é recalculado)
+medias_moveis, mensal, data_inicio_agregados = atualizar_agregados(tabela_diaria, diretorio_parquet)
+print(data_inicio_agregados, len(medias_moveis), len(mensal))
+medias_moveis.tail(8)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Consultas Rápidas ao Estado Mais Recente
+# MAGIC As consultas mais frequentes (último dia de ENA em % da MLT, EAR em % e Carga por subsistema, ou poucos dias de um subsistema) são respondidas em milissegundos pela tabela diária mantida em memória, indexada por (Subsistema, Data), sem consultas Spark ao DW. A tabela é relida automaticamente quando uma nova atualização é gravada. Fora do notebook, as mesmas consultas ficam disponíveis por HTTP com `python -m ons_dados serve --parquet <diretório>`.
+
+# COMMAND ----------
+
+# Último dia disponível de cada subsistema e as 2 últimas semanas do Sudeste
+consulta = Consulta(diretorio_parquet)
+print(consulta.ultimo())
+consulta.intervalo("Sudeste", consulta.ultimo().index.get_level_values("Data").max() - pd.Timedelta(days=13))
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC # Seção II: Spark e Hive
+# MAGIC > O Apache Spark é um mecanismo de análise unificada para código aberto em computação distribuída. Será utilizado no presente trabalho para o processamento de dados em grande escala, com módulos integrados para SQL e Python.
+
+# COMMAND ----------
+
+# Conferindo se as colunas de cada DataFrame seguem a definição das tabelas DWTABLE_ENA, DWTABLE_EARM e DWTABLE_CARGA
+validar_contrato(ena, "ena")
+validar_contrato(earm, "ear")
+validar_contrato(carga, "carga")
+validar_contrato(cmo, "cmo")
+
+# COMMAND ----------
+
+# Modo de ingestão no Spark: "pandas" converte os DataFrames ena, earm e carga (adequado a cargas pequenas);
+# "spark" lê os .csv do cache diretamente pelo Spark, com esquema explícito, sem passar todo o histórico pelo driver
+ingestao = "pandas"
+
+# COMMAND ----------
+
+# Criando os DataFrames relacionados à ENA, EAR, Carga e CMO
+if ingestao == "spark":
+    spark_ena = ler_dataset_spark(spark, "ena", caminhos_cache(cache_ons, arquivos, "ena"))
+    spark_earm = ler_dataset_spark(spark, "ear", caminhos_cache(cache_ons, arquivos, "ear"))
+    spark_carga = ler_dataset_spark(spark, "carga", caminhos_cache(cache_ons, arquivos, "carga"))
+    spark_cmo = ler_dataset_spark(spark, "cmo", caminhos_cache(cache_ons, arquivos, "cmo"))
+else:
+    with metricas.etapa("createDataFrame", "ena", linhas_entrada=len(ena)):
+        spark_ena = spark.createDataFrame(ena)
+    with metricas.etapa("createDataFrame", "ear", linhas_entrada=len(earm)):
+        spark_earm = spark.createDataFrame(earm)
+    with metricas.etapa("createDataFrame", "carga", linhas_entrada=len(carga)):
+        spark_carga = spark.createDataFrame(carga)
+    with metricas.etapa("createDataFrame", "cmo", linhas_entrada=len(cmo)):
+        spark_cmo = spark.createDataFrame(cmo)
+
+# COMMAND ----------
+
+# Criando uma visualização temporária para cada query: DW_ENA; DW_EARM; DW_CARGA; DW_CMO
+spark_ena.createOrReplaceTempView("DW_ENA")
+spark_earm.createOrReplaceTempView("DW_EARM")
+spark_carga.createOrReplaceTempView("DW_CARGA")
+spark_cmo.createOrReplaceTempView("DW_CMO")
+
+# COMMAND ----------
+
+# Criando a visualização temporária da tabela diária consolidada (DW_DIARIA), a partir das visualizações acima
+spark.sql(sql_diaria()).createOrReplaceTempView("DW_DIARIA")
+
+# COMMAND ----------
+
+# Criando as visualizações temporárias dos agregados, apenas com as linhas recalculadas nesta atualização.
+# Em uma atualização sem mudanças, os agregados e as alterações vêm vazios (o Spark não infere o esquema de um
+# DataFrame vazio): a visualização não é criada e a carga correspondente é pulada, como em pipeline.carregar_visao
+visoes_com_linhas = set()
+for visao, df in [("DW_MEDIAS_MOVEIS", medias_moveis), ("DW_MENSAL", mensal), ("DW_ALTERACOES", alteracoes)]:
+    if not df.empty:
+        spark.createDataFrame(df).createOrReplaceTempView(visao)
+        visoes_com_linhas.add(visao)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC > As tabelas são criadas apenas se ainda não existirem, preservando definições e comentários. A carga padrão ("upsert") faz um MERGE pela chave (id_subsistema, Data): somente os dias novos ou revisados pelo ONS são gravados e, por serem tabelas Delta, os leitores continuam acessando a versão anterior durante a carga. O modo "completa" regrava todo o histórico (INSERT OVERWRITE).
+
+# COMMAND ----------
+
+# Modo de carga das tabelas: "upsert" (MERGE das linhas novas ou revisadas) ou "completa" (INSERT OVERWRITE de todo o histórico)
+# dias_recarga limita o MERGE aos últimos dias a partir da data mais recente já carregada. O padrão (None) compara todo o
+# histórico, para que revisões do ONS em dias antigos (ver DWTABLE_ALTERACOES) também cheguem às tabelas; o MERGE só
+# regrava as linhas cujos valores mudaram
+modo_carga = "upsert"
+dias_recarga = None
 
 # COMMAND ----------
 
@@ -387,7 +504,7 @@ spark_carga.createOrReplaceTempView("DW_CARGA")
 # COMMAND ----------
 
 # MAGIC %sql
-# MAGIC CREATE OR REPLACE TABLE hive_metastore.sprintiii_isabelanatal.DWTABLE_ENA
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_ENA
 # MAGIC (
 # MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
 # MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
@@ -402,14 +519,13 @@ spark_carga.createOrReplaceTempView("DW_CARGA")
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC INSERT OVERWRITE TABLE hive_metastore.sprintiii_isabelanatal.DWTABLE_ENA
-# MAGIC SELECT * FROM DW_ENA
+# Carregando DW_ENA na tabela DWTABLE_ENA, conforme o modo de carga definido acima
+carregar_tabela(spark, "ena", modo_carga, dias_recarga, metricas=metricas)
 
 # COMMAND ----------
 
 # MAGIC %sql
-# MAGIC CREATE OR REPLACE TABLE hive_metastore.sprintiii_isabelanatal.DWTABLE_EARM
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_EARM
 # MAGIC (
 # MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
 # MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
@@ -425,14 +541,13 @@ spark_carga.createOrReplaceTempView("DW_CARGA")
 
 # COMMAND ----------
 
-# MAGIC %sql
-# MAGIC INSERT OVERWRITE TABLE hive_metastore.sprintiii_isabelanatal.DWTABLE_EARM
-# MAGIC SELECT * FROM DW_EARM
+# Carregando DW_EARM na tabela DWTABLE_EARM, conforme o modo de carga definido acima
+carregar_tabela(spark, "ear", modo_carga, dias_recarga, metricas=metricas)
 
 # COMMAND ----------
 
 # MAGIC %sql
-# MAGIC CREATE OR REPLACE TABLE hive_metastore.sprintiii_isabelanatal.DWTABLE_CARGA
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_CARGA
 # MAGIC (
 # MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
 # MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
@@ -444,9 +559,193 @@ spark_carga.createOrReplaceTempView("DW_CARGA")
 
 # COMMAND ----------
 
+# Carregando DW_CARGA na tabela DWTABLE_CARGA, conforme o modo de carga definido acima
+carregar_tabela(spark, "carga", modo_carga, dias_recarga, metricas=metricas)
+
+# COMMAND ----------
+
 # MAGIC %sql
-# MAGIC INSERT OVERWRITE TABLE hive_metastore.sprintiii_isabelanatal.DWTABLE_CARGA
-# MAGIC SELECT * FROM DW_CARGA
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_CMO
+# MAGIC (
+# MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
+# MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
+# MAGIC  Data DATE COMMENT 'Data de início da semana operativa - Valores a partir de 2001, até a semana vigente',
+# MAGIC  val_cmomediasemanal DOUBLE COMMENT 'Valor do Custo Marginal da Operação médio da semana operativa, por subsistema, na unidade de medida R$/MWh.',
+# MAGIC  val_cmoleve DOUBLE COMMENT 'Valor do Custo Marginal da Operação no patamar de carga leve, por subsistema, na unidade de medida R$/MWh.',
+# MAGIC  val_cmomedia DOUBLE COMMENT 'Valor do Custo Marginal da Operação no patamar de carga média, por subsistema, na unidade de medida R$/MWh.',
+# MAGIC  val_cmopesada DOUBLE COMMENT 'Valor do Custo Marginal da Operação no patamar de carga pesada, por subsistema, na unidade de medida R$/MWh.'
+# MAGIC ) COMMENT 'Dados do Custo Marginal da Operação (CMO) semanal por subsistema, nos patamares de carga leve, médio e pesado e na média semanal.
+# MAGIC
+# MAGIC O CMO é a base do Preço de Liquidação das Diferenças (PLD). Os dados disponibilizados fazem parte de um processo de consistência recorrente e, portanto, podem ser atualizados após a sua publicação.'
+
+# COMMAND ----------
+
+# Carregando DW_CMO na tabela DWTABLE_CMO, conforme o modo de carga definido acima
+carregar_tabela(spark, "cmo", modo_carga, dias_recarga, metricas=metricas)
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_DIARIA
+# MAGIC (
+# MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
+# MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
+# MAGIC  Data DATE COMMENT 'Data da medida observada - Apenas os dias presentes nas séries de ENA, EAR e Carga',
+# MAGIC  ena_bruta_regiao_mwmed DOUBLE COMMENT 'ENA bruta por Subsistema, em MWmed (ver DWTABLE_ENA).',
+# MAGIC  ena_bruta_regiao_percentualmlt DOUBLE COMMENT 'ENA bruta por Subsistema, em percentual da MLT (ver DWTABLE_ENA).',
+# MAGIC  ena_armazenavel_regiao_mwmed DOUBLE COMMENT 'ENA armazenável por Subsistema, em MWmed (ver DWTABLE_ENA).',
+# MAGIC  ena_armazenavel_regiao_percentualmlt DOUBLE COMMENT 'ENA armazenável por Subsistema, em percentual da MLT (ver DWTABLE_ENA).',
+# MAGIC  ear_max_subsistema DOUBLE COMMENT 'Energia armazenada máxima por subsistema, em MWmês (ver DWTABLE_EARM).',
+# MAGIC  ear_verif_subsistema_mwmes DOUBLE COMMENT 'Energia armazenada verificada no dia por subsistema, em MWmês (ver DWTABLE_EARM).',
+# MAGIC  ear_verif_subsistema_percentual DOUBLE COMMENT 'Energia armazenada verificada no dia por subsistema, em % da EAR máxima (ver DWTABLE_EARM).',
+# MAGIC  val_cargaenergiamwmed DOUBLE COMMENT 'Carga de energia por subsistema, na média diária, em MWmed (ver DWTABLE_CARGA).',
+# MAGIC  val_cmomediasemanal DOUBLE COMMENT 'CMO médio da semana operativa que contém o dia, em R$/MWh (ver DWTABLE_CMO). Nulo se a semana não foi publicada.',
+# MAGIC  val_cmoleve DOUBLE COMMENT 'CMO no patamar de carga leve da semana operativa que contém o dia, em R$/MWh (ver DWTABLE_CMO).',
+# MAGIC  val_cmomedia DOUBLE COMMENT 'CMO no patamar de carga média da semana operativa que contém o dia, em R$/MWh (ver DWTABLE_CMO).',
+# MAGIC  val_cmopesada DOUBLE COMMENT 'CMO no patamar de carga pesada da semana operativa que contém o dia, em R$/MWh (ver DWTABLE_CMO).'
+# MAGIC ) COMMENT 'Tabela diária consolidada por subsistema, com ENA, EAR, Carga e o CMO da semana operativa vigente. Contém apenas os dias presentes nas três séries diárias.'
+
+# COMMAND ----------
+
+# Carregando DW_DIARIA na tabela DWTABLE_DIARIA, conforme o modo de carga definido acima
+carregar_tabela(spark, "diaria", modo_carga, dias_recarga, metricas=metricas)
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_MEDIAS_MOVEIS
+# MAGIC (
+# MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
+# MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
+# MAGIC  Data DATE COMMENT 'Data da medida observada (mesmos dias da DWTABLE_DIARIA)',
+# MAGIC  ena_bruta_regiao_mwmed_mm7 DOUBLE,
+# MAGIC  ena_bruta_regiao_mwmed_mm30 DOUBLE,
+# MAGIC  ena_bruta_regiao_mwmed_mm90 DOUBLE,
+# MAGIC  ena_bruta_regiao_mwmed_var_anual DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_mm7 DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_mm30 DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_mm90 DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_var_anual DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_mm7 DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_mm30 DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_mm90 DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_var_anual DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_mm7 DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_mm30 DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_mm90 DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_var_anual DOUBLE,
+# MAGIC  ear_max_subsistema_mm7 DOUBLE,
+# MAGIC  ear_max_subsistema_mm30 DOUBLE,
+# MAGIC  ear_max_subsistema_mm90 DOUBLE,
+# MAGIC  ear_max_subsistema_var_anual DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_mm7 DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_mm30 DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_mm90 DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_var_anual DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_mm7 DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_mm30 DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_mm90 DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_var_anual DOUBLE,
+# MAGIC  val_cargaenergiamwmed_mm7 DOUBLE,
+# MAGIC  val_cargaenergiamwmed_mm30 DOUBLE,
+# MAGIC  val_cargaenergiamwmed_mm90 DOUBLE,
+# MAGIC  val_cargaenergiamwmed_var_anual DOUBLE
+# MAGIC ) COMMENT 'Médias móveis de 7, 30 e 90 dias corridos (sufixos _mm7, _mm30, _mm90) e variação em relação ao mesmo dia do ano anterior (sufixo _var_anual) das grandezas da DWTABLE_DIARIA, por subsistema.'
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_MENSAL
+# MAGIC (
+# MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
+# MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
+# MAGIC  Data DATE COMMENT 'Primeiro dia do mês de referência',
+# MAGIC  ena_bruta_regiao_mwmed_media DOUBLE,
+# MAGIC  ena_bruta_regiao_mwmed_min DOUBLE,
+# MAGIC  ena_bruta_regiao_mwmed_max DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_media DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_min DOUBLE,
+# MAGIC  ena_bruta_regiao_percentualmlt_max DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_media DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_min DOUBLE,
+# MAGIC  ena_armazenavel_regiao_mwmed_max DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_media DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_min DOUBLE,
+# MAGIC  ena_armazenavel_regiao_percentualmlt_max DOUBLE,
+# MAGIC  ear_max_subsistema_media DOUBLE,
+# MAGIC  ear_max_subsistema_min DOUBLE,
+# MAGIC  ear_max_subsistema_max DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_media DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_min DOUBLE,
+# MAGIC  ear_verif_subsistema_mwmes_max DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_media DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_min DOUBLE,
+# MAGIC  ear_verif_subsistema_percentual_max DOUBLE,
+# MAGIC  val_cargaenergiamwmed_media DOUBLE,
+# MAGIC  val_cargaenergiamwmed_min DOUBLE,
+# MAGIC  val_cargaenergiamwmed_max DOUBLE
+# MAGIC ) COMMENT 'Média, mínimo e máximo mensais (sufixos _media, _min, _max) das grandezas da DWTABLE_DIARIA, por subsistema.'
+
+# COMMAND ----------
+
+# Carregando os agregados: as visualizações já contêm apenas as linhas recalculadas, então o MERGE compara todas elas
+if "DW_MEDIAS_MOVEIS" in visoes_com_linhas:
+    carregar_tabela(spark, "medias_moveis", modo_carga, None, metricas=metricas)
+if "DW_MENSAL" in visoes_com_linhas:
+    carregar_tabela(spark, "mensal", modo_carga, None, metricas=metricas)
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_ALTERACOES
+# MAGIC (
+# MAGIC  dataset STRING COMMENT 'Grandeza alterada - Valores possíveis: ena, ear, carga, cmo',
+# MAGIC  tipo STRING COMMENT 'Tipo da alteração - Valores possíveis: inclusao, revisao, exclusao',
+# MAGIC  id_subsistema STRING COMMENT 'Código do Subsistema - Valores possíveis: NE, N, SE, S',
+# MAGIC  Subsistema STRING COMMENT 'Nome do Subsistema - Valores possíveis: Nordeste, Norte, Sudeste, Sul',
+# MAGIC  Data DATE COMMENT 'Data da medida alterada',
+# MAGIC  hash_anterior BIGINT COMMENT 'Hash dos valores da linha na atualização anterior (nulo nas inclusões)',
+# MAGIC  hash_atual BIGINT COMMENT 'Hash dos valores da linha nesta atualização (nulo nas exclusões)',
+# MAGIC  detectado_em TIMESTAMP COMMENT 'Momento da atualização em que a alteração foi detectada'
+# MAGIC ) COMMENT 'Registro das inclusões, revisões e exclusões de dados feitas pelo ONS, detectadas a cada atualização. Permite invalidar apenas o que mudou nas tabelas e análises derivadas.'
+
+# COMMAND ----------
+
+# Acrescentando as alterações detectadas nesta atualização ao registro
+if "DW_ALTERACOES" in visoes_com_linhas:
+    inserir_tabela(spark, "alteracoes", metricas=metricas)
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC > Cada atualização registra o tempo, os bytes, as linhas e a memória de cada etapa (download e leitura de cada ano, tratamento, conversão para Spark e carga de cada tabela). Os registros são exportados em JSON e acumulados na tabela DWTABLE_METRICAS, permitindo comparar execuções e atribuir uma regressão a uma etapa e a um ano específicos.
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC CREATE TABLE IF NOT EXISTS hive_metastore.sprintiii_isabelanatal.DWTABLE_METRICAS
+# MAGIC (
+# MAGIC  execucao STRING COMMENT 'Identificador da atualização',
+# MAGIC  etapa STRING COMMENT 'Etapa medida - Ex.: download, parse, converter_data, concat, subsistemas, createDataFrame, hive_merge',
+# MAGIC  dataset STRING COMMENT 'Grandeza ou tabela da etapa - Ex.: ena, ear, carga, cmo, diaria',
+# MAGIC  ano INT COMMENT 'Ano do arquivo, nas etapas executadas por ano',
+# MAGIC  inicio TIMESTAMP COMMENT 'Início da etapa (UTC)',
+# MAGIC  segundos DOUBLE COMMENT 'Duração da etapa, em segundos',
+# MAGIC  bytes BIGINT COMMENT 'Bytes baixados ou lidos',
+# MAGIC  linhas_entrada BIGINT COMMENT 'Linhas recebidas pela etapa',
+# MAGIC  linhas_saida BIGINT COMMENT 'Linhas produzidas (ou afetadas, no MERGE) pela etapa',
+# MAGIC  memoria_mib DOUBLE COMMENT 'Memória residente do driver ao fim da etapa, em MiB',
+# MAGIC  pico_memoria_mib DOUBLE COMMENT 'Pico de memória residente do driver durante a etapa, em MiB',
+# MAGIC  detalhe STRING COMMENT 'Informação complementar - Ex.: origem do arquivo (rede, validado, cache)'
+# MAGIC ) COMMENT 'Métricas de execução de cada etapa das atualizações, para acompanhamento de desempenho.'
+
+# COMMAND ----------
+
+# Exportando as métricas desta atualização (JSON Lines) e acrescentando-as à tabela DWTABLE_METRICAS
+metricas.exportar_json("/dbfs/FileStore/sprintiii_isabelanatal/metricas.jsonl")
+spark.createDataFrame(metricas.para_dataframe()).createOrReplaceTempView("DW_METRICAS")
+inserir_tabela(spark, "metricas")
+metricas.resumo()
 
 # COMMAND ----------
 
@@ -462,3 +761,33 @@ spark_carga.createOrReplaceTempView("DW_CARGA")
 
 # MAGIC %sql
 # MAGIC SELECT * FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_CARGA
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC SELECT * FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_CMO
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC SELECT * FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_DIARIA
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC SELECT * FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_MEDIAS_MOVEIS
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC SELECT * FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_MENSAL
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC SELECT * FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_ALTERACOES ORDER BY detectado_em DESC
+
+# COMMAND ----------
+
+# MAGIC %sql
+# MAGIC SELECT etapa, dataset, ano, segundos, linhas_saida, pico_memoria_mib FROM hive_metastore.sprintiii_isabelanatal.DWTABLE_METRICAS ORDER BY inicio DESC
@@ -0,0 +1,52 @@
+"""Benchmark da montagem dos datasets: concatenação dentro do laço de anos x concatenação única.
+
+Gera DataFrames sintéticos com o formato da ENA (4 subsistemas, dados diários; ver ``sintetico.py``) e mede, para cada
+quantidade de anos, o tempo e o pico de memória alocada (tracemalloc) das duas estratégias.
+
+Uso: python benchmarks/bench_montagem.py [anos_max]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from benchmarks.sintetico import gerar_ano  # noqa: E402
+
+
+def concat_no_laco(anos):
+    resultado = anos[0]
+    for ano in anos[1:]:
+        resultado = pd.concat([resultado, ano])
+    return resultado
+
+
+def concat_unico(anos):
+    return pd.concat(anos, ignore_index=True)
+
+
+def medir(funcao, anos):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao(anos)
+    segundos = time.perf_counter() - inicio
+    _atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 2**20
+
+
+def main(anos_max=100):
+    print(f"{'anos':>5} {'laço (s)':>10} {'laço (MiB)':>11} {'único (s)':>10} {'único (MiB)':>12}")
+    for quantidade in (5, 10, 25, 50, anos_max):
+        anos = [gerar_ano("ena", 2001 + i % 30) for i in range(quantidade)]
+        laco = medir(concat_no_laco, anos)
+        unico = medir(concat_unico, anos)
+        print(f"{quantidade:>5} {laco[0]:>10.3f} {laco[1]:>11.1f} {unico[0]:>10.3f} {unico[1]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(argumento) for argumento in sys.argv[1:]))
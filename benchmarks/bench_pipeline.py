@@ -0,0 +1,178 @@
+"""Benchmark de ponta a ponta do pipeline, sem acesso aos buckets do ONS.
+
+Gera arquivos anuais sintéticos de ENA, EAR, Carga e CMO com o layout real (ver ``sintetico.py``), os serve
+por um servidor HTTP local (ou diretamente do disco, com ``--servidor file``) e executa, em um processo
+separado, o caminho completo: download → leitura e tratamento → tabela diária consolidada → carga no
+armazenamento Parquet (séries, tabela diária e agregados), que é a carga local equivalente à do Hive.
+
+Relata, por etapa, o tempo, as linhas processadas, a vazão e o pico de memória, além do tempo total e do
+pico de memória residente do processo. Com ``--saida`` o resultado é gravado em JSON; com ``--base``, é
+comparado a um resultado gravado anteriormente, de modo que cada mudança de desempenho possa ser avaliada
+contra uma linha de base. Com ``--processos``, a atualização é executada pelo DAG de ``ons_dados.pipeline``,
+com os datasets processados em paralelo (0 executa o mesmo DAG em sequência).
+
+Uso: python benchmarks/bench_pipeline.py [--anos 20] [--horas 1] [--servidor http|file] [--workers 8]
+                                         [--processos N] [--saida resultado.json] [--base linha_de_base.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from benchmarks.sintetico import gravar_anos, servidor_http  # noqa: E402
+from ons_dados.agregados import atualizar_agregados  # noqa: E402
+from ons_dados.armazenamento import gravar_parquet  # noqa: E402
+from ons_dados.consolidacao import montar_tabela_diaria  # noqa: E402
+from ons_dados.download import baixar_anos, montar_dataset  # noqa: E402
+from ons_dados.esquemas import ESQUEMAS  # noqa: E402
+from ons_dados.metricas import Metricas  # noqa: E402
+from ons_dados.pipeline import atualizar  # noqa: E402
+from ons_dados.tratamento import tratar  # noqa: E402
+
+DATASETS = ["ena", "ear", "carga", "cmo"]
+ANO_ZERO = 2001
+
+
+def _diario(df, dataset):
+    """Média diária de uma série com vários registros por dia (Carga sintética com ``horas > 1``)."""
+    dias = df["Data"].dt.floor("D")
+    return (df.groupby(["id_subsistema", "Subsistema", dias], observed=True, sort=False)[list(ESQUEMAS[dataset].medidas)]
+            .mean().reset_index())
+
+
+def pipeline(base_url, ano_fim, horas, destino, workers, metricas):
+    arquivos = baixar_anos(DATASETS, ANO_ZERO, ano_fim, workers=workers, base_url=base_url, metricas=metricas)
+    series = {dataset: tratar(montar_dataset(arquivos, dataset, ANO_ZERO, ano_fim, metricas=metricas), dataset, metricas)
+              for dataset in DATASETS}
+    if horas > 1:
+        with metricas.etapa("diario", "carga", linhas_entrada=len(series["carga"])) as registro:
+            series["carga"] = _diario(series["carga"], "carga")
+            registro["linhas_saida"] = len(series["carga"])
+
+    with metricas.etapa("tabela_diaria", "diaria",
+                        linhas_entrada=sum(len(df) for df in series.values())) as registro:
+        tabela, _descartados = montar_tabela_diaria(series["ena"], series["ear"], series["carga"], series["cmo"])
+        registro["linhas_saida"] = len(tabela)
+
+    for dataset, df in series.items():
+        with metricas.etapa("gravar_parquet", dataset, linhas_entrada=len(df), linhas_saida=len(df)):
+            gravar_parquet(df, dataset, destino)
+    with metricas.etapa("agregados", "diaria", linhas_entrada=len(tabela)) as registro:
+        medias_moveis, mensal, _data_inicio = atualizar_agregados(tabela, destino)
+        registro["linhas_saida"] = len(medias_moveis) + len(mensal)
+
+
+def _executar(base_url, ano_fim, horas, destino, workers, processos, fila):
+    metricas = Metricas("benchmark")
+    inicio = time.perf_counter()
+    if processos is None:
+        pipeline(base_url, ano_fim, horas, destino, workers, metricas)
+    else:
+        atualizar(DATASETS, ANO_ZERO, ano_fim, workers, diretorio=destino, base_url=base_url, metricas=metricas,
+                  processos=processos)
+    registros = metricas.para_dataframe()
+    # ru_maxrss é informado em KiB no Linux; como as etapas zeram o pico do processo para medir o seu,
+    # o pico da execução é o maior entre ele e os picos das etapas
+    pico = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, registros["pico_memoria_mib"].max())
+    fila.put((time.perf_counter() - inicio, pico, registros))
+
+
+def medir(base_url, ano_fim, horas, destino, workers, processos=None):
+    """Executa o pipeline em um processo novo, para que o pico de memória seja apenas o do pipeline."""
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_executar,
+                                       args=(base_url, ano_fim, horas, destino, workers, processos, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def resumir(segundos, pico, registros):
+    """Resultado por etapa (somado entre datasets e anos) e totais da execução, em formato serializável."""
+    etapas = (registros.groupby("etapa", sort=False)
+              .agg(segundos=("segundos", "sum"), linhas=("linhas_saida", "sum"), bytes=("bytes", "sum"),
+                   pico_memoria_mib=("pico_memoria_mib", "max")))
+    linhas_lidas = registros.loc[registros["etapa"] == "parse", "linhas_saida"].sum()
+    return {
+        "segundos": segundos,
+        "pico_memoria_mib": pico,
+        "bytes": float(registros.loc[registros["etapa"] == "download", "bytes"].sum()),
+        "linhas_lidas": float(linhas_lidas),
+        "linhas_por_segundo": float(linhas_lidas / segundos),
+        "etapas": {etapa: {coluna: float(valor) for coluna, valor in linha.items()}
+                   for etapa, linha in etapas.fillna(0).iterrows()},
+    }
+
+
+def relatar(resultado, base=None):
+    print(f"{'etapa':<16} {'segundos':>9} {'linhas':>11} {'linhas/s':>12} {'MiB/s':>8} {'pico (MiB)':>11}"
+          + (f" {'base (s)':>9} {'variação':>9}" if base else ""))
+    for etapa, valores in resultado["etapas"].items():
+        segundos = valores["segundos"] or float("nan")
+        linha = (f"{etapa:<16} {valores['segundos']:>9.3f} {valores['linhas']:>11.0f}"
+                 f" {valores['linhas'] / segundos:>12.0f} {valores['bytes'] / 2**20 / segundos:>8.1f}"
+                 f" {valores['pico_memoria_mib']:>11.1f}")
+        if base:
+            anterior = base["etapas"].get(etapa, {}).get("segundos")
+            linha += (f" {anterior:>9.3f} {valores['segundos'] / anterior - 1:>+9.1%}" if anterior
+                      else f" {'-':>9} {'-':>9}")
+        print(linha)
+    print(f"\ntotal: {resultado['segundos']:.2f} s, {resultado['linhas_por_segundo']:.0f} linhas/s, "
+          f"{resultado['bytes'] / 2**20 / resultado['segundos']:.1f} MiB/s baixados, "
+          f"pico de memória {resultado['pico_memoria_mib']:.1f} MiB")
+    if base:
+        print(f"linha de base: {base['segundos']:.2f} s ({resultado['segundos'] / base['segundos'] - 1:+.1%}), "
+              f"pico de memória {base['pico_memoria_mib']:.1f} MiB "
+              f"({resultado['pico_memoria_mib'] / base['pico_memoria_mib'] - 1:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anos", type=int, default=20, help="anos de histórico, a partir de 2001")
+    parser.add_argument("--horas", type=int, default=1, help="registros por dia na Carga (ex.: 24 para horária)")
+    parser.add_argument("--servidor", choices=["http", "file"], default="http")
+    parser.add_argument("--workers", type=int, default=8, help="downloads simultâneos")
+    parser.add_argument("--processos", type=int, help="executa pelo DAG de ons_dados.pipeline, com N processos")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    parser.add_argument("--base", help="resultado JSON anterior, para comparação")
+    argumentos = parser.parse_args()
+    if argumentos.processos is not None and argumentos.horas > 1:
+        parser.error("o DAG monta a tabela diária direto das séries tratadas; use --horas 1 com --processos")
+
+    ano_fim = ANO_ZERO + argumentos.anos - 1
+    with tempfile.TemporaryDirectory() as diretorio:
+        fontes = os.path.join(diretorio, "fontes")
+        # ENA, EAR e CMO são publicadas apenas com dados diários/semanais; a granularidade varia na Carga
+        gravar_anos(fontes, ["ena", "ear", "cmo"], ANO_ZERO, ano_fim)
+        gravar_anos(fontes, ["carga"], ANO_ZERO, ano_fim, argumentos.horas)
+        destino = os.path.join(diretorio, "parquet")
+        if argumentos.servidor == "http":
+            with servidor_http(fontes) as base_url:
+                segundos, pico, registros = medir(base_url, ano_fim, argumentos.horas, destino, argumentos.workers,
+                                                  argumentos.processos)
+        else:
+            segundos, pico, registros = medir("file://" + fontes + "/", ano_fim, argumentos.horas, destino,
+                                              argumentos.workers, argumentos.processos)
+
+    resultado = resumir(segundos, pico, registros)
+    resultado["parametros"] = vars(argumentos)
+    base = None
+    if argumentos.base:
+        with open(argumentos.base, encoding="utf8") as arquivo:
+            base = json.load(arquivo)
+    relatar(resultado, base)
+    if argumentos.saida:
+        with open(argumentos.saida, "w", encoding="utf8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark de memória: ingestão completa em pandas x ingestão em blocos.
+
+Para cada quantidade de anos, grava arquivos sintéticos da curva de carga horária (com ``horas`` registros
+por dia) e mede, em um processo novo (``spawn``, que não herda a memória do processo que gera os arquivos),
+o pico de memória residente (ru_maxrss) de cada modo. Na ingestão em blocos, o pico deve se manter estável
+à medida que o histórico cresce.
+
+Uso: python benchmarks/bench_streaming.py [horas] [linhas_bloco]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from benchmarks.sintetico import gravar_anos  # noqa: E402
+from ons_dados.armazenamento import gravar_parquet  # noqa: E402
+from ons_dados.download import baixar_anos, montar_dataset  # noqa: E402
+from ons_dados.streaming import blocos_dataset, gravar_blocos_parquet  # noqa: E402
+from ons_dados.tratamento import tratar  # noqa: E402
+
+ANO_ZERO = 2001
+DATASET = "carga_horaria"
+
+
+def _completo(base_url, ano_fim, destino, _linhas_bloco):
+    arquivos = baixar_anos([DATASET], ANO_ZERO, ano_fim, base_url=base_url)
+    gravar_parquet(tratar(montar_dataset(arquivos, DATASET, ANO_ZERO, ano_fim), DATASET), DATASET, destino)
+
+
+def _blocos(base_url, ano_fim, destino, linhas_bloco):
+    gravar_blocos_parquet(blocos_dataset(DATASET, ANO_ZERO, ano_fim, linhas_bloco, base_url=base_url), DATASET, destino)
+
+
+def _executar(modo, base_url, ano_fim, destino, linhas_bloco, fila):
+    inicio = time.perf_counter()
+    modo(base_url, ano_fim, destino, linhas_bloco)
+    # ru_maxrss é informado em KiB no Linux
+    fila.put((time.perf_counter() - inicio, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def medir(modo, base_url, ano_fim, destino, linhas_bloco):
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar, args=(modo, base_url, ano_fim, destino, linhas_bloco, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def main(horas=24, linhas_bloco=50_000):
+    with tempfile.TemporaryDirectory() as diretorio:
+        fontes = os.path.join(diretorio, "fontes")
+        base_url = "file://" + fontes + "/"
+        print(f"{'anos':>5} {'completo (s)':>13} {'completo (MiB)':>15} {'blocos (s)':>11} {'blocos (MiB)':>13}")
+        ano_gerado = ANO_ZERO - 1
+        for quantidade in (2, 5, 10, 20):
+            ano_fim = ANO_ZERO + quantidade - 1
+            gravar_anos(fontes, [DATASET], ano_gerado + 1, ano_fim, horas)
+            ano_gerado = ano_fim
+            completo = medir(_completo, base_url, ano_fim, os.path.join(diretorio, "completo"), linhas_bloco)
+            blocos = medir(_blocos, base_url, ano_fim, os.path.join(diretorio, "blocos"), linhas_bloco)
+            print(f"{quantidade:>5} {completo[0]:>13.2f} {completo[1]:>15.1f} {blocos[0]:>11.2f} {blocos[1]:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(argumento) for argumento in sys.argv[1:]))
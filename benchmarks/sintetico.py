@@ -0,0 +1,78 @@
+"""Geração de arquivos anuais sintéticos com o mesmo layout dos .csv do ONS.
+
+Os arquivos são gravados em ``<diretorio>/<pasta>/<prefixo><ano>.csv``, a mesma estrutura dos buckets do
+ONS, de modo que ``diretorio`` pode ser usado como ``base_url`` (``file://...`` ou o servidor HTTP local
+de ``servidor_http``).
+"""
+
+import functools
+import http.server
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from ons_dados.esquemas import ESQUEMAS
+from ons_dados.fontes import DATASETS
+
+SUBSISTEMAS = [("N", "NORTE"), ("NE", "NORDESTE"), ("S", "SUL"), ("SE", "SUDESTE")]
+
+
+def gerar_ano(dataset, ano, horas=1):
+    """DataFrame sintético de ``dataset`` em ``ano``, com ``horas`` registros por dia e subsistema.
+
+    Com ``horas > 1`` a coluna de data recebe o horário ("AAAA-MM-DD HH:00:00"), como nas séries horárias.
+    """
+    esquema = ESQUEMAS[dataset]
+    frequencia = "7D" if dataset == "cmo" else ("D" if horas == 1 else f"{24 // horas}h")
+    instantes = pd.date_range(f"{ano}-01-01", f"{ano}-12-31 23:59", freq=frequencia)
+    formato = "%Y-%m-%d" if horas == 1 else "%Y-%m-%d %H:00:00"
+    n = len(instantes) * len(SUBSISTEMAS)
+    aleatorio = np.random.default_rng(ano)
+    nomes = {"carga": "Sudeste/Centro-Oeste", "carga_horaria": "Sudeste/Centro-Oeste"}
+    df = pd.DataFrame({
+        "id_subsistema": np.tile([codigo for codigo, _nome in SUBSISTEMAS], len(instantes)),
+        "nom_subsistema": np.tile([nomes.get(dataset, nome) if codigo == "SE" else nome
+                                   for codigo, nome in SUBSISTEMAS], len(instantes)),
+        esquema.coluna_data: np.repeat(instantes.strftime(formato), len(SUBSISTEMAS)),
+    })
+    for coluna in esquema.medidas:
+        df[coluna] = aleatorio.uniform(0, 50000, n).round(2)
+    return df
+
+
+def gravar_anos(diretorio, datasets, ano_zero, ano_fim, horas=1):
+    """Grava os arquivos sintéticos de ``datasets`` para todos os anos e retorna o total de bytes gravados."""
+    total = 0
+    for dataset in datasets:
+        pasta = os.path.join(diretorio, DATASETS[dataset]["pasta"])
+        os.makedirs(pasta, exist_ok=True)
+        for ano in range(ano_zero, ano_fim + 1):
+            caminho = os.path.join(pasta, DATASETS[dataset]["prefixo"] + str(ano) + ".csv")
+            gerar_ano(dataset, ano, horas).to_csv(caminho, sep=";", index=False)
+            total += os.path.getsize(caminho)
+    return total
+
+
+class _Arquivos(http.server.SimpleHTTPRequestHandler):
+
+    def log_message(self, *_argumentos):
+        pass
+
+
+@contextmanager
+def servidor_http(diretorio):
+    """Serve ``diretorio`` por HTTP em uma porta livre de localhost, enquanto durar o bloco ``with``.
+
+    Retorna a ``base_url`` a ser passada a ``baixar_anos`` no lugar dos buckets do ONS.
+    """
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Arquivos, directory=diretorio))
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_address[1]}/"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,5 @@
+"""Rotinas de obtenção e tratamento dos Dados Abertos do ONS (ENA, EAR e Carga por subsistema).
+
+A atualização completa pode ser executada pela linha de comando (``python -m ons_dados refresh``) ou por
+``ons_dados.pipeline.atualizar``.
+"""
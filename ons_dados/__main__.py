@@ -0,0 +1,5 @@
+import sys
+
+from ons_dados.cli import main
+
+sys.exit(main())
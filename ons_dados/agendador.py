@@ -0,0 +1,175 @@
+"""Agendador de tarefas com dependências (DAG) para a atualização dos datasets.
+
+Cada tarefa roda assim que as tarefas das quais depende terminam: as de CPU (leitura e tratamento dos .csv,
+junção) em um pool de processos, as de E/S (downloads, gravações, cargas no Hive) em um pool de threads.
+Assim, ENA, EAR, Carga e CMO são processados simultaneamente e o tempo total se aproxima do tempo do
+dataset mais lento.
+
+Cada tarefa recebe uma impressão digital das suas entradas (a sua ``chave`` e as impressões das saídas das
+dependências). Com um arquivo de ``estado``, uma tarefa cujas entradas não mudaram desde a última execução
+bem-sucedida não é executada; se uma tarefa seguinte precisar do seu resultado, ele é obtido por
+``recuperar`` (ex.: lido do armazenamento Parquet), apenas nesse momento.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from ons_dados.metricas import Metricas
+
+
+@dataclass
+class Tarefa:
+    """Uma etapa do DAG; ``funcao(*resultados_das_dependencias, metricas=...)`` produz o seu resultado.
+
+    ``processo=True`` executa a tarefa em um processo separado (a função e os argumentos devem ser
+    serializáveis). ``sempre=True`` impede que a tarefa seja pulada (ex.: downloads, que precisam consultar o
+    ONS para saber se algo mudou). ``impressao`` calcula a impressão do resultado; sem ela, a impressão da
+    saída é a das entradas (tarefas determinísticas).
+    """
+
+    nome: str
+    funcao: object
+    dependencias: tuple = ()
+    processo: bool = False
+    sempre: bool = False
+    chave: str = ""
+    impressao: object = None
+    recuperar: object = None
+
+
+class _Adiado:
+    """Resultado de uma tarefa pulada, recuperado apenas se alguma tarefa seguinte for executada."""
+
+    def __init__(self, recuperar):
+        self.recuperar = recuperar
+
+    def obter(self):
+        return self.recuperar() if self.recuperar is not None else None
+
+
+def _impressao(*partes):
+    return hashlib.sha256(json.dumps(partes, default=str).encode("utf8")).hexdigest()
+
+
+def _executar_em_processo(funcao, argumentos, execucao):
+    # As métricas do processo filho voltam com o resultado e são acrescentadas às da execução
+    metricas = Metricas(execucao)
+    return funcao(*argumentos, metricas=metricas), metricas.registros
+
+
+class Agendador:
+    """DAG de tarefas executado com ``processos`` processos e ``threads`` threads.
+
+    ``processos=0`` executa tudo no processo atual, em sequência; ``estado`` é o caminho do arquivo JSON com as
+    impressões da última execução (sem ele, nenhuma tarefa é pulada).
+    """
+
+    def __init__(self, processos=None, threads=None, estado=None):
+        self.processos = processos if processos is not None else os.cpu_count()
+        self.threads = threads or max(self.processos, 4)
+        self.estado = estado
+        self.tarefas = {}
+        # Nomes das tarefas puladas na última execução
+        self.puladas = set()
+
+    def adicionar(self, nome, funcao, dependencias=(), **opcoes):
+        for dependencia in dependencias:
+            if dependencia not in self.tarefas:
+                raise ValueError(f"Tarefa {nome!r} depende de {dependencia!r}, que não foi adicionada antes")
+        self.tarefas[nome] = Tarefa(nome, funcao, tuple(dependencias), **opcoes)
+
+    def _ler_estado(self):
+        if self.estado is None or not os.path.exists(self.estado):
+            return {}
+        with open(self.estado, encoding="utf8") as arquivo:
+            return json.load(arquivo)
+
+    def _gravar_estado(self, estado):
+        if self.estado is None:
+            return
+        temporario = self.estado + ".tmp"
+        with open(temporario, "w", encoding="utf8") as arquivo:
+            json.dump(estado, arquivo, indent=1)
+        os.replace(temporario, self.estado)
+
+    def executar(self, metricas=None):
+        """Executa o DAG e retorna ``{nome: resultado}``; tarefas puladas cujo resultado não foi necessário ficam com ``None``.
+
+        O estado só é regravado se todas as tarefas terminarem, para que uma falha não faça a próxima
+        execução pular etapas que não chegaram a ser concluídas.
+        """
+        metricas = metricas if metricas is not None else Metricas()
+        anterior = self._ler_estado()
+        estado = dict(anterior)
+        self.puladas = set()
+        resultados, saidas = {}, {}
+        pendentes = dict(self.tarefas)
+        em_execucao = {}
+
+        def entradas(tarefa):
+            return _impressao(tarefa.chave, [saidas[dependencia] for dependencia in tarefa.dependencias])
+
+        def argumentos(tarefa):
+            for dependencia in tarefa.dependencias:
+                if isinstance(resultados[dependencia], _Adiado):
+                    resultados[dependencia] = resultados[dependencia].obter()
+            return [resultados[dependencia] for dependencia in tarefa.dependencias]
+
+        def concluir(tarefa, resultado, inicio, segundos, modo):
+            resultados[tarefa.nome] = resultado
+            impressao_entradas = entradas(tarefa)
+            saidas[tarefa.nome] = tarefa.impressao(resultado) if tarefa.impressao else impressao_entradas
+            estado[tarefa.nome] = {"entradas": impressao_entradas, "saida": saidas[tarefa.nome]}
+            metricas.registrar("tarefa", tarefa.nome, segundos=segundos, inicio=inicio, detalhe=modo)
+
+        def prontas():
+            return [tarefa for tarefa in pendentes.values()
+                    if all(dependencia in saidas for dependencia in tarefa.dependencias)]
+
+        processos = ProcessPoolExecutor(self.processos) if self.processos else None
+        threads = ThreadPoolExecutor(self.threads) if self.processos else None
+        try:
+            while pendentes or em_execucao:
+                for tarefa in prontas():
+                    del pendentes[tarefa.nome]
+                    registro = anterior.get(tarefa.nome)
+                    if not tarefa.sempre and registro is not None and registro["entradas"] == entradas(tarefa):
+                        resultados[tarefa.nome] = _Adiado(tarefa.recuperar)
+                        saidas[tarefa.nome] = registro["saida"]
+                        metricas.registrar("tarefa", tarefa.nome, segundos=0.0, detalhe="pulada")
+                        self.puladas.add(tarefa.nome)
+                        continue
+                    inicio, relogio = time.time(), time.perf_counter()
+                    if processos is None:
+                        concluir(tarefa, tarefa.funcao(*argumentos(tarefa), metricas=metricas), inicio,
+                                 time.perf_counter() - relogio, "sequencial")
+                    elif tarefa.processo:
+                        futuro = processos.submit(_executar_em_processo, tarefa.funcao, argumentos(tarefa),
+                                                  metricas.execucao)
+                        em_execucao[futuro] = (tarefa, inicio, relogio)
+                    else:
+                        futuro = threads.submit(tarefa.funcao, *argumentos(tarefa), metricas=metricas)
+                        em_execucao[futuro] = (tarefa, inicio, relogio)
+                if not em_execucao:
+                    if pendentes and not prontas():
+                        raise RuntimeError(f"Tarefas sem como executar: {sorted(pendentes)}")
+                    continue
+                concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    tarefa, inicio, relogio = em_execucao.pop(futuro)
+                    resultado = futuro.result()
+                    if tarefa.processo:
+                        resultado, registros = resultado
+                        metricas.acrescentar(registros)
+                    concluir(tarefa, resultado, inicio, time.perf_counter() - relogio,
+                             "processo" if tarefa.processo else "thread")
+        finally:
+            for executor in (processos, threads):
+                if executor is not None:
+                    executor.shutdown(wait=True, cancel_futures=True)
+        self._gravar_estado(estado)
+        return {nome: None if isinstance(resultado, _Adiado) else resultado for nome, resultado in resultados.items()}
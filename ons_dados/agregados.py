@@ -0,0 +1,149 @@
+"""Agregados pré-calculados sobre a tabela diária consolidada: médias móveis, variação anual e resumo mensal.
+
+Os agregados são gravados no armazenamento Parquet (e nas tabelas DWTABLE_MEDIAS_MOVEIS e DWTABLE_MENSAL),
+junto com a tabela diária, que é regravada sempre que qualquer coluna muda (inclusive o CMO, que não entra nos
+agregados). Em uma nova atualização, apenas as linhas afetadas pelos dias novos ou revisados são recalculadas: as médias
+móveis a partir do primeiro dia alterado (com ``max(JANELAS)`` dias de histórico anterior como base) e os
+meses a partir do mês desse dia.
+"""
+
+import os
+
+import pandas as pd
+
+from ons_dados.armazenamento import gravar_parquet, ler_parquet
+from ons_dados.consolidacao import DATASETS_DIARIOS, INDICE, colunas_diaria
+from ons_dados.esquemas import ESQUEMAS
+
+JANELAS = (7, 30, 90)
+ESTATISTICAS_MENSAIS = ("mean", "min", "max")
+_SUFIXOS_MENSAIS = {"mean": "media", "min": "min", "max": "max"}
+_CHAVE = [("id_subsistema", "STRING"), ("Subsistema", "STRING"), ("Data", "DATE")]
+
+
+def colunas_base():
+    """Medidas diárias (ENA, EAR e Carga) sobre as quais os agregados são calculados."""
+    return [coluna for dataset in DATASETS_DIARIOS for coluna in ESQUEMAS[dataset].medidas]
+
+
+def colunas_medias_moveis():
+    """Colunas e tipos SQL da tabela DWTABLE_MEDIAS_MOVEIS."""
+    return _CHAVE + [(f"{coluna}_{sufixo}", "DOUBLE") for coluna in colunas_base()
+                     for sufixo in [f"mm{janela}" for janela in JANELAS] + ["var_anual"]]
+
+
+def colunas_mensal():
+    """Colunas e tipos SQL da tabela DWTABLE_MENSAL (Data é o primeiro dia do mês)."""
+    return _CHAVE + [(f"{coluna}_{_SUFIXOS_MENSAIS[estatistica]}", "DOUBLE") for coluna in colunas_base()
+                     for estatistica in ESTATISTICAS_MENSAIS]
+
+
+def calcular_medias_moveis(tabela, data_inicio=None):
+    """Médias móveis de 7, 30 e 90 dias corridos e variação em relação ao mesmo dia do ano anterior.
+
+    ``tabela`` é a tabela diária consolidada (índice (Subsistema, Data) ordenado). Com ``data_inicio``, só
+    as linhas a partir dessa data são calculadas, usando os ``max(JANELAS)`` dias anteriores como base.
+    """
+    colunas = colunas_base()
+    base = tabela.reset_index()
+    if data_inicio is not None:
+        data_inicio = pd.Timestamp(data_inicio)
+        base = base[base["Data"] > data_inicio - pd.Timedelta(days=max(JANELAS))]
+    resultado = {coluna: base[coluna] for coluna in ("id_subsistema", "Subsistema", "Data")}
+    grupos = base.groupby("Subsistema", observed=True, sort=False)
+    for janela in JANELAS:
+        # A tabela está ordenada por (Subsistema, Data), então o resultado por grupo segue a ordem das linhas de base
+        medias = grupos.rolling(f"{janela}D", on="Data")[colunas].mean().to_numpy()
+        for posicao, coluna in enumerate(colunas):
+            resultado[f"{coluna}_mm{janela}"] = medias[:, posicao]
+    # Variação anual: busca no índice (Subsistema, Data - 1 ano) da tabela completa
+    ano_anterior = pd.MultiIndex.from_arrays([base["Subsistema"], base["Data"] - pd.DateOffset(years=1)], names=INDICE)
+    variacao = base[colunas].to_numpy() - tabela[colunas].reindex(ano_anterior).to_numpy()
+    for posicao, coluna in enumerate(colunas):
+        resultado[f"{coluna}_var_anual"] = variacao[:, posicao]
+    medias_moveis = pd.DataFrame(resultado)[[coluna for coluna, _tipo in colunas_medias_moveis()]]
+    if data_inicio is not None:
+        medias_moveis = medias_moveis[medias_moveis["Data"] >= data_inicio]
+    return medias_moveis.reset_index(drop=True)
+
+
+def calcular_mensal(tabela, data_inicio=None):
+    """Média, mínimo e máximo mensais por subsistema; com ``data_inicio``, apenas a partir do mês dessa data."""
+    colunas = colunas_base()
+    base = tabela.reset_index()
+    if data_inicio is not None:
+        base = base[base["Data"] >= pd.Timestamp(data_inicio).to_period("M").to_timestamp()]
+    mes = base["Data"].dt.to_period("M").dt.to_timestamp().rename("Data")
+    mensal = base.groupby([base["id_subsistema"], base["Subsistema"], mes], observed=True)[colunas].agg(
+        list(ESTATISTICAS_MENSAIS))
+    mensal.columns = [f"{coluna}_{_SUFIXOS_MENSAIS[estatistica]}" for coluna, estatistica in mensal.columns]
+    return mensal.reset_index()[[coluna for coluna, _tipo in colunas_mensal()]]
+
+
+def primeira_data_alterada(anterior, atual, colunas=None):
+    """Primeiro dia de ``atual`` que é novo ou difere de ``anterior`` (ambas tabelas diárias consolidadas).
+
+    Compara as ``colunas`` informadas (padrão: as colunas de base dos agregados). Retorna ``None`` se nada
+    mudou e a primeira data de ``atual`` se não houver ``anterior``.
+    """
+    if anterior is None or anterior.empty:
+        return atual.index.get_level_values("Data").min()
+    colunas = colunas_base() if colunas is None else colunas
+    comparavel = anterior[colunas].reindex(atual.index)
+    # Valores nulos nos dois lados são considerados iguais
+    iguais = (comparavel.to_numpy() == atual[colunas].to_numpy()) | (comparavel.isna().to_numpy() & atual[colunas].isna().to_numpy())
+    alterados = ~iguais.all(axis=1)
+    if not alterados.any():
+        return None
+    return atual.index.get_level_values("Data")[alterados].min()
+
+
+def _substituir_a_partir(anterior, novos, data_inicio):
+    if anterior is None:
+        return novos
+    return pd.concat([anterior[anterior["Data"] < data_inicio], novos], ignore_index=True).sort_values(
+        by=["Subsistema", "Data"], kind="stable", ignore_index=True)
+
+
+def _inicio_ano(data):
+    return pd.Timestamp(year=pd.Timestamp(data).year, month=1, day=1)
+
+
+def atualizar_agregados(tabela, diretorio):
+    """Atualiza no armazenamento Parquet a tabela diária e os agregados, recalculando só o trecho alterado.
+
+    A tabela diária é regravada (a partir do ano do primeiro dia alterado) quando qualquer uma das suas colunas
+    muda; os agregados, apenas quando mudam as colunas de base. Retorna ``(medias_moveis, mensal,
+    data_inicio)`` apenas com as linhas recalculadas (para a carga incremental no Hive) e a data a partir da
+    qual os agregados mudaram (``None`` se nada mudou).
+    """
+    def _ler(dataset, data_inicio=None):
+        if not os.path.isdir(os.path.join(diretorio, dataset)):
+            return None
+        return ler_parquet(dataset, diretorio, data_inicio=data_inicio)
+
+    anterior = _ler("diaria")
+    if anterior is not None:
+        anterior = anterior.set_index(INDICE).sort_index()
+    # As partições são por ano: regrava por completo os anos afetados, lendo do disco apenas esses anos
+    medidas_diaria = [coluna for coluna, _tipo in colunas_diaria() if coluna not in ["id_subsistema"] + INDICE]
+    data_diaria = primeira_data_alterada(anterior, tabela, medidas_diaria)
+    if data_diaria is not None:
+        diaria = tabela.reset_index()
+        gravar_parquet(diaria[diaria["Data"] >= _inicio_ano(data_diaria)], "diaria", diretorio)
+
+    data_inicio = primeira_data_alterada(anterior, tabela)
+    if data_inicio is None:
+        return (pd.DataFrame(columns=[coluna for coluna, _tipo in colunas_medias_moveis()]),
+                pd.DataFrame(columns=[coluna for coluna, _tipo in colunas_mensal()]), None)
+
+    medias_moveis = calcular_medias_moveis(tabela, data_inicio)
+    mensal = calcular_mensal(tabela, data_inicio)
+    inicio_ano = _inicio_ano(data_inicio)
+    completas = {
+        "medias_moveis": _substituir_a_partir(_ler("medias_moveis", inicio_ano), medias_moveis, data_inicio),
+        "mensal": _substituir_a_partir(_ler("mensal", inicio_ano), mensal, mensal["Data"].min()),
+    }
+    for dataset, df in completas.items():
+        gravar_parquet(df, dataset, diretorio)
+    return medias_moveis, mensal, data_inicio
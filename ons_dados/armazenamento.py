@@ -0,0 +1,83 @@
+"""Armazenamento local, em Parquet, dos DataFrames já tratados de ENA, EAR, Carga e CMO e das tabelas derivadas.
+
+Cada dataset é gravado em ``<diretorio>/<dataset>/ano=<ano>/Subsistema=<nome>/``, de modo que a leitura
+de um recorte (ex.: Sudeste, 2020 a 2023) abra apenas as partições e os row groups necessários.
+"""
+
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTICOES = ("ano", "Subsistema")
+PARTICIONAMENTO = ds.partitioning(pa.schema([("ano", pa.int32()), ("Subsistema", pa.string())]), flavor="hive")
+
+
+def _caminho(diretorio, dataset):
+    return os.path.join(diretorio, dataset)
+
+
+def gravar_parquet(df, dataset, diretorio, sufixo=None):
+    """Grava ``df`` particionado por ano e subsistema.
+
+    Apenas as partições presentes em ``df`` são substituídas; as demais permanecem no disco, o que permite
+    regravar somente os anos atualizados. Com ``sufixo``, ``df`` é acrescentado às partições em arquivos
+    ``part-<sufixo>-*.parquet``, sem apagar os já gravados (usado no registro de alterações).
+    """
+    tabela = pa.Table.from_pandas(df.assign(ano=df["Data"].dt.year), preserve_index=False)
+    if sufixo is None:
+        ds.write_dataset(tabela, _caminho(diretorio, dataset), format="parquet", partitioning=PARTICIONAMENTO,
+                         existing_data_behavior="delete_matching")
+    else:
+        ds.write_dataset(tabela, _caminho(diretorio, dataset), format="parquet", partitioning=PARTICIONAMENTO,
+                         existing_data_behavior="overwrite_or_ignore", basename_template=f"part-{sufixo}-{{i}}.parquet")
+
+
+def remover_anos(dataset, diretorio, anos):
+    """Apaga as partições dos ``anos`` informados (antes de regravá-los em blocos)."""
+    for ano in anos:
+        shutil.rmtree(os.path.join(_caminho(diretorio, dataset), f"ano={ano}"), ignore_errors=True)
+
+
+def _filtro(subsistemas, data_inicio, data_fim):
+    condicoes = []
+    if subsistemas is not None:
+        condicoes.append(ds.field("Subsistema").isin(list(subsistemas)))
+    # O filtro pelo ano elimina partições inteiras; o filtro pela data usa as estatísticas dos row groups
+    if data_inicio is not None:
+        data_inicio = pd.Timestamp(data_inicio)
+        condicoes.append(ds.field("ano") >= data_inicio.year)
+        condicoes.append(ds.field("Data") >= pa.scalar(data_inicio.to_pydatetime(), pa.timestamp("s")))
+    if data_fim is not None:
+        data_fim = pd.Timestamp(data_fim)
+        condicoes.append(ds.field("ano") <= data_fim.year)
+        condicoes.append(ds.field("Data") <= pa.scalar(data_fim.to_pydatetime(), pa.timestamp("s")))
+    filtro = None
+    for condicao in condicoes:
+        filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+
+def ler_parquet(dataset, diretorio, subsistemas=None, data_inicio=None, data_fim=None, como_arrow=False):
+    """Lê o recorte de ``dataset`` definido pelos subsistemas e pelo intervalo de datas (inclusivo).
+
+    Os arquivos são mapeados em memória e o filtro é aplicado na leitura (partições e row groups fora do
+    recorte não são lidos). Com ``como_arrow=True`` retorna a ``pyarrow.Table`` sem conversão; caso
+    contrário, um DataFrame com as colunas na ordem da tabela DWTABLE_* correspondente (inclusive para a
+    tabela diária e os agregados).
+    """
+    tabela = pq.read_table(_caminho(diretorio, dataset), partitioning=PARTICIONAMENTO, memory_map=True,
+                           filters=_filtro(subsistemas, data_inicio, data_fim))
+    # Subsistema, lido da partição, volta para logo após id_subsistema, como nas tabelas DWTABLE_*
+    colunas = [coluna for coluna in tabela.column_names if coluna not in PARTICOES]
+    colunas.insert(colunas.index("id_subsistema") + 1 if "id_subsistema" in colunas else 0, "Subsistema")
+    tabela = tabela.select(colunas)
+    if como_arrow:
+        return tabela
+    # split_blocks/self_destruct evitam consolidar as colunas em blocos e liberam a memória Arrow durante a conversão
+    df = tabela.to_pandas(split_blocks=True, self_destruct=True)
+    df["Subsistema"] = df["Subsistema"].astype("category")
+    return df
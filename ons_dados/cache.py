@@ -0,0 +1,91 @@
+"""Cache local, em disco, dos arquivos anuais baixados do ONS.
+
+Cada URL gera um par de arquivos: o .csv bruto e um .json com os validadores HTTP (ETag e Last-Modified)
+e o hash SHA-256 do conteúdo, usado para detectar arquivos corrompidos ou alterados no disco.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+
+def hash_conteudo(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+class CacheArquivos:
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, url, extensao):
+        chave = hashlib.sha1(url.encode("utf8")).hexdigest()
+        return os.path.join(self.diretorio, chave + extensao)
+
+    def caminho_conteudo(self, url):
+        """Caminho do .csv gravado para ``url`` (que pode ainda não existir)."""
+        return self._caminho(url, ".csv")
+
+    def metadados(self, url):
+        """Validadores gravados para ``url``, ou ``None`` se a URL não estiver no cache."""
+        caminho = self._caminho(url, ".json")
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, encoding="utf8") as arquivo:
+            return json.load(arquivo)
+
+    def ler(self, url):
+        """Conteúdo gravado para ``url``; ``None`` se ausente ou se o hash não confere com o dos metadados."""
+        meta = self.metadados(url)
+        caminho = self._caminho(url, ".csv")
+        if meta is None or not os.path.exists(caminho):
+            return None
+        with open(caminho, "rb") as arquivo:
+            conteudo = arquivo.read()
+        if hash_conteudo(conteudo) != meta["sha256"]:
+            return None
+        return conteudo
+
+    def gravar(self, url, conteudo, etag=None, last_modified=None):
+        """Grava o conteúdo e os validadores de ``url``. Retorna ``True`` se o conteúdo mudou em relação ao cache."""
+        anterior = self.metadados(url)
+        sha256 = hash_conteudo(conteudo)
+        # Grava em arquivo temporário e renomeia, para não deixar um .csv pela metade se o processo for interrompido
+        caminho = self._caminho(url, ".csv")
+        with open(caminho + ".tmp", "wb") as arquivo:
+            arquivo.write(conteudo)
+        os.replace(caminho + ".tmp", caminho)
+        agora = time.time()
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "sha256": sha256, "gravado_em": agora,
+                "validado_em": agora}
+        with open(self._caminho(url, ".json.tmp"), "w", encoding="utf8") as arquivo:
+            json.dump(meta, arquivo)
+        os.replace(self._caminho(url, ".json.tmp"), self._caminho(url, ".json"))
+        return anterior is None or anterior["sha256"] != sha256
+
+    def marcar_validado(self, url):
+        """Registra que o conteúdo gravado para ``url`` foi confirmado pelo servidor (resposta 304)."""
+        meta = self.metadados(url)
+        if meta is None:
+            return
+        meta["validado_em"] = time.time()
+        with open(self._caminho(url, ".json.tmp"), "w", encoding="utf8") as arquivo:
+            json.dump(meta, arquivo)
+        os.replace(self._caminho(url, ".json.tmp"), self._caminho(url, ".json"))
+
+    def conferido_desde(self, url, instante):
+        """Se o conteúdo de ``url`` foi baixado ou confirmado pelo servidor a partir de ``instante`` (epoch)."""
+        meta = self.metadados(url) or {}
+        return max(meta.get("gravado_em", 0), meta.get("validado_em", 0)) >= instante
+
+    def cabecalhos_condicionais(self, url):
+        """Cabeçalhos If-None-Match/If-Modified-Since para uma requisição condicional de ``url``."""
+        meta = self.metadados(url) or {}
+        cabecalhos = {}
+        if meta.get("etag"):
+            cabecalhos["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            cabecalhos["If-Modified-Since"] = meta["last_modified"]
+        return cabecalhos
@@ -0,0 +1,108 @@
+"""Linha de comando da atualização dos dados do ONS.
+
+Exemplos: ``python -m ons_dados refresh --datasets ena,ear,carga --since 2015 --workers 16 --parquet dados/`` e
+``python -m ons_dados serve --parquet dados/ --port 8050`` (consultas por HTTP, ver ``consulta.py``).
+
+Sem ``--spark``, a atualização roda apenas com pandas/pyarrow (nenhum módulo do Spark é importado); com
+``--spark``, a sessão é obtida (ou criada) e o resultado é carregado nas tabelas DWTABLE_* do Hive.
+"""
+
+import argparse
+import sys
+
+from ons_dados.cache import CacheArquivos
+from ons_dados.consulta import Consulta, servidor_http
+from ons_dados.pipeline import ANO_ZERO, DATASETS, atualizar
+from ons_dados.warehouse import BANCO
+
+
+def _datasets(valor):
+    datasets = [dataset.strip() for dataset in valor.split(",") if dataset.strip()]
+    desconhecidos = sorted(set(datasets) - set(DATASETS))
+    if desconhecidos:
+        raise argparse.ArgumentTypeError(f"datasets desconhecidos: {', '.join(desconhecidos)} (use {', '.join(DATASETS)})")
+    return datasets
+
+
+def _sessao_spark():
+    # Importado apenas quando a carga no Hive é pedida, para não pesar na inicialização dos jobs sem Spark
+    from pyspark.sql import SparkSession
+    return SparkSession.builder.appName("ons_dados").getOrCreate()
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m ons_dados", description="Dados Abertos do ONS por subsistema")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    refresh = comandos.add_parser("refresh", help="baixa, trata, armazena e carrega os datasets")
+    refresh.add_argument("--datasets", type=_datasets, default=list(DATASETS),
+                         help=f"lista separada por vírgulas (padrão: {','.join(DATASETS)})")
+    refresh.add_argument("--since", type=int, default=ANO_ZERO, help=f"primeiro ano (padrão: {ANO_ZERO})")
+    refresh.add_argument("--until", type=int, help="último ano (padrão: o ano vigente)")
+    refresh.add_argument("--workers", type=int, default=16, help="total de downloads simultâneos, somados todos os datasets")
+    refresh.add_argument("--processes", type=int,
+                         help="processos para leitura, tratamento e junção (padrão: um por núcleo; 0 = sequencial)")
+    refresh.add_argument("--threads", type=int, help="tarefas de E/S simultâneas (gravações e cargas)")
+    refresh.add_argument("--cache", help="diretório do cache em disco dos arquivos do ONS")
+    refresh.add_argument("--revalidar-fechados", action="store_true",
+                         help="confere no servidor também os anos fechados já gravados no cache")
+    refresh.add_argument("--parquet", help="diretório do armazenamento Parquet (revisões, tabela diária e agregados)")
+    refresh.add_argument("--spark", action="store_true", help="carrega o resultado nas tabelas DWTABLE_* do Hive")
+    refresh.add_argument("--modo", choices=["upsert", "completa"], default="upsert", help="modo de carga no Hive")
+    refresh.add_argument("--dias-recarga", type=int, help="limita o MERGE aos últimos N dias (padrão: todo o histórico, inclusive revisões antigas)")
+    refresh.add_argument("--banco", default=BANCO, help="banco de dados do Hive")
+    refresh.add_argument("--base-url", help="substitui os buckets do ONS (ex.: servidor local de testes)")
+    refresh.add_argument("--metricas", help="acrescenta as métricas da execução a este arquivo (JSON Lines)")
+    serve = comandos.add_parser("serve", help="consultas por subsistema e data via HTTP, a partir do armazenamento Parquet")
+    serve.add_argument("--parquet", required=True, help="diretório do armazenamento Parquet")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8050)
+    serve.add_argument("--cache", type=int, default=256, help="intervalos mantidos no cache LRU")
+    return parser
+
+
+def servir(argumentos):
+    servidor = servidor_http(Consulta(argumentos.parquet, tamanho_cache=argumentos.cache), argumentos.host,
+                             argumentos.port)
+    print(f"Consultas em http://{argumentos.host}:{servidor.server_address[1]}/ (/ultimo, /dia, /intervalo)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+def main(argv=None, spark=None):
+    """Executa a linha de comando; ``spark`` permite reutilizar uma sessão já existente (ex.: em um notebook)."""
+    argumentos = criar_parser().parse_args(argv)
+    if argumentos.comando == "serve":
+        return servir(argumentos)
+    cache = CacheArquivos(argumentos.cache) if argumentos.cache else None
+    if spark is None and argumentos.spark:
+        spark = _sessao_spark()
+
+    atualizacao = atualizar(argumentos.datasets, argumentos.since, argumentos.until, argumentos.workers, cache,
+                            argumentos.parquet, spark, argumentos.modo, argumentos.dias_recarga, argumentos.banco,
+                            argumentos.base_url, processos=argumentos.processes, threads=argumentos.threads,
+                            revalidar_fechados=argumentos.revalidar_fechados)
+    for dataset in argumentos.datasets:
+        df = atualizacao.series.get(dataset)
+        if df is None or f"tratar_{dataset}" in atualizacao.puladas:
+            print(f"{dataset}: sem alterações desde a última atualização (pulado)")
+        else:
+            print(f"{dataset}: {len(df)} linhas, {df['Data'].min():%Y-%m-%d} a {df['Data'].max():%Y-%m-%d}")
+    if atualizacao.alteracoes is not None:
+        print(f"alterações detectadas: {len(atualizacao.alteracoes)}")
+    if "tabela_diaria" in atualizacao.puladas:
+        print("tabela diária: sem alterações desde a última atualização (pulada)")
+    elif atualizacao.tabela is not None:
+        print(f"tabela diária: {len(atualizacao.tabela)} linhas")
+    print(atualizacao.metricas.resumo().to_string())
+    if argumentos.metricas:
+        atualizacao.metricas.exportar_json(argumentos.metricas)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""Alinhamento do CMO semanal aos dados diários de ENA, EAR e Carga."""
+
+import pandas as pd
+
+from ons_dados.esquemas import ESQUEMAS
+
+
+def alinhar_cmo(diario, cmo, colunas=None, tolerancia="6D"):
+    """Acrescenta a ``diario`` o CMO da semana operativa de cada dia, por subsistema.
+
+    Cada dia recebe a última semana do mesmo subsistema iniciada até aquela data (junção "as of" sobre as
+    datas ordenadas, sem replicar as semanas em dias). Dias a mais de ``tolerancia`` do início da última
+    semana publicada ficam sem CMO. O resultado mantém as linhas e a ordem cronológica de ``diario``.
+    """
+    colunas = list(colunas or ESQUEMAS["cmo"].medidas)
+    semanal = cmo[["id_subsistema", "Data"] + colunas]
+    # merge_asof exige as duas tabelas ordenadas pela data e a chave "by" com o mesmo tipo dos dois lados
+    if not semanal["Data"].is_monotonic_increasing:
+        semanal = semanal.sort_values(by="Data", kind="stable")
+    subsistemas = pd.CategoricalDtype(
+        diario["id_subsistema"].astype("category").cat.categories.union(
+            semanal["id_subsistema"].astype("category").cat.categories))
+    esquerda = diario.assign(id_subsistema=diario["id_subsistema"].astype(subsistemas))
+    direita = semanal.assign(id_subsistema=semanal["id_subsistema"].astype(subsistemas),
+                             Data=semanal["Data"].astype(esquerda["Data"].dtype))
+    return pd.merge_asof(esquerda, direita, on="Data", by="id_subsistema", direction="backward",
+                         tolerance=pd.Timedelta(tolerancia))
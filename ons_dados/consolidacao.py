@@ -0,0 +1,84 @@
+"""Tabela diária consolidada de ENA, EAR, Carga e CMO, indexada por (Subsistema, Data).
+
+As três séries diárias são alinhadas por índice em uma única junção (em vez de mesclagens sucessivas), e
+os dias que não existem em todas elas (ex.: o dia a mais da Carga) são descartados e informados. O CMO
+semanal é acrescentado pela semana operativa vigente em cada dia.
+"""
+
+import pandas as pd
+import pyarrow as pa
+
+from ons_dados.cmo import alinhar_cmo
+from ons_dados.esquemas import ESQUEMAS
+
+DATASETS_DIARIOS = ("ena", "ear", "carga")
+INDICE = ["Subsistema", "Data"]
+
+
+def colunas_diaria():
+    """Colunas e tipos SQL da tabela DWTABLE_DIARIA."""
+    return ([("id_subsistema", "STRING"), ("Subsistema", "STRING"), ("Data", "DATE")]
+            + [(coluna, "DOUBLE") for dataset in DATASETS_DIARIOS + ("cmo",) for coluna in ESQUEMAS[dataset].medidas])
+
+
+def _indexar(df, dataset, colunas):
+    indexado = df.set_index(INDICE)[colunas]
+    if not indexado.index.is_unique:
+        repetidos = indexado.index[indexado.index.duplicated()].unique()
+        raise ValueError(f"{dataset} tem {len(repetidos)} pares (Subsistema, Data) repetidos, ex.: {list(repetidos[:3])}")
+    return indexado
+
+
+def montar_tabela_diaria(ena, earm, carga, cmo=None):
+    """Monta a tabela diária consolidada.
+
+    Retorna ``(tabela, descartados)``: ``tabela`` tem índice (Subsistema, Data) ordenado, o que torna as
+    consultas por subsistema e intervalo de datas buscas no índice; ``descartados`` lista os dias ausentes em
+    alguma das séries, indicando em quais delas cada dia existe. Sem ``cmo``, as colunas de CMO ficam nulas.
+    """
+    partes = {
+        "ena": _indexar(ena, "ena", ["id_subsistema"] + list(ESQUEMAS["ena"].medidas)),
+        "ear": _indexar(earm, "ear", list(ESQUEMAS["ear"].medidas)),
+        "carga": _indexar(carga, "carga", list(ESQUEMAS["carga"].medidas)),
+    }
+    tabela = pd.concat(partes.values(), axis=1, join="inner").sort_index()
+
+    todos = partes["ena"].index.union(partes["ear"].index).union(partes["carga"].index)
+    fora = todos.difference(tabela.index)
+    descartados = pd.DataFrame({dataset: fora.isin(parte.index) for dataset, parte in partes.items()},
+                               index=fora).reset_index()
+
+    colunas_cmo = list(ESQUEMAS["cmo"].medidas)
+    if cmo is None:
+        tabela = tabela.assign(**{coluna: float("nan") for coluna in colunas_cmo})
+    else:
+        # merge_asof exige a ordem cronológica; o índice final volta a ser (Subsistema, Data)
+        cronologica = tabela.reset_index().sort_values(by="Data", kind="stable")
+        tabela = alinhar_cmo(cronologica, cmo, colunas_cmo).set_index(INDICE).sort_index()
+    tabela["id_subsistema"] = tabela["id_subsistema"].astype("category")
+    return tabela, descartados
+
+
+def tabela_arrow(tabela):
+    """A tabela diária como ``pyarrow.Table``, com as colunas na ordem da DWTABLE_DIARIA."""
+    return pa.Table.from_pandas(tabela.reset_index()[[coluna for coluna, _tipo in colunas_diaria()]],
+                                preserve_index=False)
+
+
+def sql_diaria(visoes=None):
+    """Consulta Spark SQL equivalente a ``montar_tabela_diaria`` sobre as visões DW_ENA, DW_EARM, DW_CARGA e DW_CMO.
+
+    As séries diárias são unidas pela chave (id_subsistema, Data); o CMO entra pela semana operativa que
+    contém o dia (início da semana <= Data < início + 7 dias).
+    """
+    visoes = visoes or {"ena": "DW_ENA", "ear": "DW_EARM", "carga": "DW_CARGA", "cmo": "DW_CMO"}
+    apelidos = {"ena": "e", "ear": "a", "carga": "c", "cmo": "m"}
+    colunas = ["e.id_subsistema", "e.Subsistema", "CAST(e.Data AS DATE) AS Data"] + [
+        f"{apelidos[dataset]}.{coluna}" for dataset in DATASETS_DIARIOS + ("cmo",) for coluna in ESQUEMAS[dataset].medidas]
+    juncoes = "".join(
+        f"\nJOIN {visoes[dataset]} {apelidos[dataset]} ON {apelidos[dataset]}.id_subsistema = e.id_subsistema"
+        f" AND CAST({apelidos[dataset]}.Data AS DATE) = CAST(e.Data AS DATE)"
+        for dataset in ("ear", "carga"))
+    return (f"SELECT {', '.join(colunas)}\nFROM {visoes['ena']} e{juncoes}\n"
+            f"LEFT JOIN {visoes['cmo']} m ON m.id_subsistema = e.id_subsistema"
+            f" AND CAST(e.Data AS DATE) >= CAST(m.Data AS DATE) AND CAST(e.Data AS DATE) < date_add(CAST(m.Data AS DATE), 7)")
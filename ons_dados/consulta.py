@@ -0,0 +1,197 @@
+"""Consultas de baixa latência ao estado mais recente de cada subsistema, sem passar pelo Spark.
+
+A tabela diária consolidada é lida uma vez do armazenamento Parquet e mantida em memória, indexada e
+ordenada por (Subsistema, Data): a leitura de um dia ou de um intervalo é uma busca no índice, e os
+intervalos consultados ficam em um cache LRU. Quando uma atualização grava novos dados no armazenamento, a
+tabela é relida e o cache é esvaziado na consulta seguinte.
+
+As mesmas consultas podem ser expostas por HTTP em localhost (``servidor_http``), retornando JSON.
+"""
+
+import functools
+import http.server
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+import pandas as pd
+import pyarrow as pa
+
+from ons_dados.armazenamento import ler_parquet
+from ons_dados.consolidacao import INDICE
+
+# Grandezas mais consultadas: ENA em % da MLT, EAR em % da capacidade e Carga
+COLUNAS_RESUMO = ("ena_bruta_regiao_percentualmlt", "ear_verif_subsistema_percentual", "val_cargaenergiamwmed")
+
+
+def _versao(diretorio, dataset):
+    """Maior instante de modificação dos arquivos e partições gravados de ``dataset`` (0 se não existir)."""
+    versao = 0
+    for raiz, _pastas, arquivos in os.walk(os.path.join(diretorio, dataset)):
+        versao = max([versao, os.stat(raiz).st_mtime_ns]
+                     + [os.stat(os.path.join(raiz, arquivo)).st_mtime_ns for arquivo in arquivos])
+    return versao
+
+
+class Consulta:
+    """Consultas por subsistema e data sobre ``dataset`` (padrão: a tabela diária) do armazenamento Parquet.
+
+    A cada ``verificar_a_cada`` segundos, no máximo, uma consulta confere se o armazenamento mudou; nesse caso a
+    tabela é relida e o cache LRU (de ``tamanho_cache`` intervalos) é esvaziado. ``invalidar`` força a releitura.
+    """
+
+    def __init__(self, diretorio, dataset="diaria", tamanho_cache=256, verificar_a_cada=1.0):
+        self.diretorio = diretorio
+        self.dataset = dataset
+        self.verificar_a_cada = verificar_a_cada
+        self._trava = threading.Lock()
+        self._intervalo = functools.lru_cache(maxsize=tamanho_cache)(self._ler_intervalo)
+        self._versao = None
+        self._verificado_em = 0.0
+        self.tabela = None
+        self._ultimos = None
+
+    def invalidar(self):
+        with self._trava:
+            self._versao = None
+            self._verificado_em = 0.0
+
+    def _atualizada(self):
+        """A tabela em memória, relida se o armazenamento mudou desde a última leitura."""
+        agora = time.monotonic()
+        if self.tabela is not None and agora - self._verificado_em < self.verificar_a_cada:
+            return self.tabela
+        with self._trava:
+            versao = _versao(self.diretorio, self.dataset)
+            if versao != self._versao:
+                tabela = ler_parquet(self.dataset, self.diretorio)
+                self.tabela = tabela.set_index(INDICE).sort_index()
+                self._ultimos = self.tabela.groupby(level="Subsistema", observed=True).tail(1)
+                self._intervalo.cache_clear()
+                self._versao = versao
+            self._verificado_em = agora
+        return self.tabela
+
+    @staticmethod
+    def _colunas(tabela, colunas):
+        return list(tabela.columns) if colunas is None else list(colunas)
+
+    def ultimo(self, subsistemas=None, colunas=COLUNAS_RESUMO):
+        """Último dia disponível de cada subsistema (ou dos ``subsistemas`` informados)."""
+        tabela = self._atualizada()
+        ultimos = self._ultimos
+        if subsistemas is not None:
+            ultimos = ultimos[ultimos.index.get_level_values("Subsistema").isin(list(subsistemas))]
+        return ultimos[self._colunas(tabela, colunas)].copy()
+
+    def dia(self, subsistema, data, colunas=None):
+        """Valores de ``subsistema`` em ``data`` (``KeyError`` se o dia não existir)."""
+        tabela = self._atualizada()
+        return tabela.loc[(subsistema, pd.Timestamp(data)), self._colunas(tabela, colunas)]
+
+    def _ler_intervalo(self, versao, subsistema, data_inicio, data_fim, colunas):
+        # versao faz parte da chave do cache, para que uma consulta em andamento durante a releitura não
+        # guarde resultados da tabela antiga sob a chave da nova
+        return self.tabela.loc[(subsistema, slice(data_inicio, data_fim)), self._colunas(self.tabela, colunas)]
+
+    def intervalo(self, subsistema, data_inicio=None, data_fim=None, colunas=None):
+        """Dias de ``subsistema`` entre ``data_inicio`` e ``data_fim`` (inclusivos); os resultados ficam em cache."""
+        self._atualizada()
+        data_inicio = pd.Timestamp(data_inicio) if data_inicio is not None else None
+        data_fim = pd.Timestamp(data_fim) if data_fim is not None else None
+        colunas = tuple(colunas) if colunas is not None else None
+        return self._intervalo(self._versao, subsistema, data_inicio, data_fim, colunas).copy()
+
+
+def _json(df):
+    return df.reset_index().to_json(orient="records", date_format="iso", force_ascii=False)
+
+
+def _lista(parametros, nome):
+    valor = parametros.get(nome)
+    return valor[0].split(",") if valor else None
+
+
+def _parametro(parametros, nome, obrigatorio=False, data=False):
+    """Valor do parâmetro ``nome`` da URL; ``ValueError`` (resposta 400) se obrigatório e ausente ou se a data
+    for inválida."""
+    valor = parametros.get(nome, [None])[0]
+    if valor is None:
+        if obrigatorio:
+            raise ValueError(f"parâmetro obrigatório ausente: {nome}")
+        return None
+    return pd.Timestamp(valor) if data else valor
+
+
+def servidor_http(consulta, host="127.0.0.1", porta=8050):
+    """Servidor HTTP (ainda não iniciado) com as rotas ``/ultimo``, ``/dia`` e ``/intervalo``.
+
+    Exemplos: ``/ultimo?subsistemas=Sudeste,Sul``, ``/dia?subsistema=Sul&data=2023-09-01`` e
+    ``/intervalo?subsistema=Sudeste&inicio=2023-08-01&fim=2023-08-31&colunas=val_cargaenergiamwmed``.
+
+    Parâmetros ausentes ou inválidos retornam 400; dias, subsistemas ou colunas inexistentes, 404; falhas ao
+    ler o armazenamento (ex.: durante a sua regravação por uma atualização), 503; e os demais erros, 500,
+    sempre com o motivo em JSON.
+    """
+
+    class Rotas(http.server.BaseHTTPRequestHandler):
+
+        def _responder(self, status, corpo):
+            conteudo = corpo.encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(conteudo)))
+            self.end_headers()
+            self.wfile.write(conteudo)
+
+        def _erro(self, status, mensagem):
+            self._responder(status, json.dumps({"erro": mensagem}, ensure_ascii=False))
+
+        def do_GET(self):
+            endereco = urllib.parse.urlsplit(self.path)
+            parametros = urllib.parse.parse_qs(endereco.query)
+            colunas = _lista(parametros, "colunas")
+            # Os parâmetros são validados antes da consulta, para que um ValueError da leitura do armazenamento
+            # (ex.: ArrowInvalid) não seja confundido com um parâmetro inválido
+            try:
+                if endereco.path == "/ultimo":
+                    argumentos = (_lista(parametros, "subsistemas"), colunas or COLUNAS_RESUMO)
+                elif endereco.path == "/dia":
+                    argumentos = (_parametro(parametros, "subsistema", obrigatorio=True),
+                                  _parametro(parametros, "data", obrigatorio=True, data=True), colunas)
+                elif endereco.path == "/intervalo":
+                    argumentos = (_parametro(parametros, "subsistema", obrigatorio=True),
+                                  _parametro(parametros, "inicio", data=True), _parametro(parametros, "fim", data=True),
+                                  colunas)
+                else:
+                    self._erro(404, f"rota desconhecida: {endereco.path}")
+                    return
+            except ValueError as erro:
+                self._erro(400, str(erro))
+                return
+            try:
+                if endereco.path == "/ultimo":
+                    corpo = _json(consulta.ultimo(*argumentos))
+                elif endereco.path == "/dia":
+                    serie = consulta.dia(*argumentos)
+                    corpo = json.dumps({chave: None if pd.isna(valor) else valor for chave, valor in serie.items()},
+                                       ensure_ascii=False, default=str)
+                else:
+                    corpo = _json(consulta.intervalo(*argumentos))
+            except KeyError as erro:
+                self._erro(404, f"não encontrado: {erro}")
+                return
+            except (OSError, pa.ArrowException) as erro:
+                self._erro(503, f"armazenamento indisponível, tente novamente: {erro}")
+                return
+            except Exception as erro:  # responde ao cliente em vez de derrubar a conexão
+                self._erro(500, f"erro interno: {erro}")
+                return
+            self._responder(200, corpo)
+
+        def log_message(self, *_argumentos):
+            pass
+
+    return http.server.ThreadingHTTPServer((host, porta), Rotas)
@@ -0,0 +1,157 @@
+"""Download paralelo dos arquivos anuais do ONS, com novas tentativas, cache em disco e tempo por arquivo."""
+
+import http.client
+import io
+import contextlib
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from ons_dados.esquemas import ESQUEMAS
+from ons_dados.fontes import DIAS_ATRASO_PUBLICACAO, url_ano
+from ons_dados.metricas import medir
+
+
+@dataclass
+class ArquivoBaixado:
+    dataset: str
+    ano: int
+    url: str
+    conteudo: bytes
+    segundos: float
+    tentativas: int
+    # "rede": baixado por completo; "validado": servidor respondeu 304 e o cache foi usado; "cache": lido do disco sem requisição
+    origem: str = "rede"
+    alterado: bool = True
+
+
+def baixar_url(url, cabecalhos=None, tentativas=3, timeout=60, espera=1.0):
+    """Baixa ``url`` e retorna ``(status, cabecalhos_resposta, conteudo, tentativas_usadas)``.
+
+    Erros de rede, respostas 5xx e conteúdos incompletos (interrompidos ou menores que o Content-Length) são
+    repetidos com espera exponencial; respostas 4xx são definitivas.
+    Uma resposta 304 (requisição condicional) é retornada com conteúdo vazio.
+    """
+    requisicao = urllib.request.Request(url, headers=cabecalhos or {})
+    for tentativa in range(1, tentativas + 1):
+        try:
+            with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+                conteudo = resposta.read()
+                esperado = resposta.headers.get("Content-Length")
+                if esperado is not None and len(conteudo) != int(esperado):
+                    raise http.client.IncompleteRead(conteudo, int(esperado) - len(conteudo))
+                return resposta.status, resposta.headers, conteudo, tentativa
+        except urllib.error.HTTPError as erro:
+            if erro.code == 304:
+                return 304, erro.headers, b"", tentativa
+            if erro.code < 500 or tentativa == tentativas:
+                raise
+        except (urllib.error.URLError, http.client.HTTPException, TimeoutError, ConnectionError):
+            if tentativa == tentativas:
+                raise
+        time.sleep(espera * 2 ** (tentativa - 1))
+
+
+def fechamento(ano):
+    """Instante (epoch) a partir do qual o arquivo de ``ano`` tem todos os dias publicados e não muda mais."""
+    return (datetime(ano + 1, 1, 1) + timedelta(days=DIAS_ATRASO_PUBLICACAO)).timestamp()
+
+
+def _baixar(dataset, ano, url, tentativas, timeout, cache, usar_disco, limite):
+    inicio = time.perf_counter()
+    em_disco = cache.ler(url) if cache is not None else None
+    # Um ano fechado só é lido do disco se a cópia for posterior ao fechamento: a gravada enquanto o ano era o
+    # vigente não tem os últimos dias e é revalidada uma vez
+    if em_disco is not None and usar_disco and cache.conferido_desde(url, fechamento(ano)):
+        return ArquivoBaixado(dataset, ano, url, em_disco, time.perf_counter() - inicio, 0, "cache", False)
+    cabecalhos = cache.cabecalhos_condicionais(url) if em_disco is not None else None
+    with limite:
+        status, resposta, conteudo, usadas = baixar_url(url, cabecalhos, tentativas=tentativas, timeout=timeout)
+    if status == 304:
+        cache.marcar_validado(url)
+        return ArquivoBaixado(dataset, ano, url, em_disco, time.perf_counter() - inicio, usadas, "validado", False)
+    alterado = True
+    if cache is not None:
+        alterado = cache.gravar(url, conteudo, resposta.get("ETag"), resposta.get("Last-Modified"))
+    return ArquivoBaixado(dataset, ano, url, conteudo, time.perf_counter() - inicio, usadas, "rede", alterado)
+
+
+def baixar_anos(datasets, ano_zero, ano_fim, workers=8, base_url=None, tentativas=3, timeout=60,
+                cache=None, revalidar_fechados=False, limite=None, metricas=None):
+    """Baixa, em paralelo, todos os anos de ``ano_zero`` a ``ano_fim`` de cada dataset.
+
+    O número de ``workers`` limita as conexões simultâneas. Com um ``cache`` (``CacheArquivos``), os anos
+    fechados já gravados (e baixados ou confirmados após o fechamento do ano) são lidos do disco sem nenhuma
+    requisição, e o ano vigente é revalidado por
+    requisição condicional (ETag/Last-Modified), sendo baixado apenas se tiver mudado.
+    ``revalidar_fechados=True`` aplica a revalidação condicional também aos anos fechados.
+    ``limite`` (ex.: ``threading.BoundedSemaphore``) limita as conexões somadas de várias chamadas simultâneas,
+    como as dos datasets baixados em paralelo pelo DAG de ``pipeline``.
+    Com ``metricas``, cada arquivo gera um registro da etapa "download" (tempo, bytes e origem).
+
+    Retorna um dicionário ``{(dataset, ano): ArquivoBaixado}``.
+    """
+    pedidos = [(dataset, ano, url_ano(dataset, ano, ano_fim, base_url))
+               for dataset in datasets
+               for ano in range(ano_zero, ano_fim + 1)]
+    limite = limite if limite is not None else contextlib.nullcontext()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(_baixar, dataset, ano, url, tentativas, timeout, cache,
+                                   ano < ano_fim and not revalidar_fechados, limite)
+                   for dataset, ano, url in pedidos]
+        arquivos = [futuro.result() for futuro in futuros]
+    if metricas is not None:
+        for arquivo in arquivos:
+            metricas.registrar("download", arquivo.dataset, arquivo.ano, arquivo.segundos,
+                               bytes=len(arquivo.conteudo), detalhe=arquivo.origem)
+    return {(arquivo.dataset, arquivo.ano): arquivo for arquivo in arquivos}
+
+
+def resumo_downloads(arquivos):
+    """Tabela com url, origem, tamanho, tempo e tentativas de cada arquivo, do mais lento ao mais rápido."""
+    resumo = pd.DataFrame([
+        {"dataset": a.dataset, "ano": a.ano, "url": a.url, "origem": a.origem, "alterado": a.alterado,
+         "bytes": len(a.conteudo), "segundos": a.segundos, "tentativas": a.tentativas}
+        for a in arquivos.values()
+    ])
+    return resumo.sort_values(by="segundos", ascending=False)
+
+
+def ler_csv(arquivo, float32=False, engine="c", metricas=None):
+    """Lê o conteúdo de um arquivo baixado (.csv em UTF-8, delimitado por ponto-e-vírgula).
+
+    Os tipos das colunas e o formato da data vêm do registro de esquemas, evitando a inferência de tipos
+    do pandas e a conversão de datas elemento a elemento. ``float32=True`` reduz pela metade a memória
+    das colunas de medida; ``engine="pyarrow"`` usa o leitor de CSV multithread do Arrow.
+    """
+    esquema = ESQUEMAS[arquivo.dataset]
+    with medir(metricas, "parse", arquivo.dataset, arquivo.ano, bytes=len(arquivo.conteudo)) as registro:
+        df = pd.read_csv(io.BytesIO(arquivo.conteudo), delimiter=";", encoding="utf8",
+                         dtype=esquema.dtypes(float32), engine=engine)
+        registro["linhas_saida"] = len(df)
+    with medir(metricas, "converter_data", arquivo.dataset, arquivo.ano, linhas_entrada=len(df)) as registro:
+        df[esquema.coluna_data] = esquema.converter_data(df[esquema.coluna_data])
+        registro["linhas_saida"] = len(df)
+    return df
+
+
+def montar_dataset(arquivos, dataset, ano_zero, ano_fim, float32=False, engine="c", metricas=None):
+    """Lê todos os anos de ``dataset`` e os concatena de uma só vez.
+
+    Concatenar dentro do laço de anos copiaria o DataFrame acumulado a cada iteração (custo quadrático
+    no número de anos, com pico de memória de cerca de 2x o resultado final).
+    """
+    anos = [ler_csv(arquivos[dataset, ano], float32, engine, metricas) for ano in range(ano_zero, ano_fim + 1)]
+    with medir(metricas, "concat", dataset, linhas_entrada=sum(len(ano) for ano in anos)) as registro:
+        df = pd.concat(anos, ignore_index=True)
+        registro["linhas_saida"] = len(df)
+    # Anos com categorias diferentes (ex.: um subsistema ausente) fazem o concat voltar a texto
+    for coluna in ESQUEMAS[dataset].colunas_categoricas:
+        if not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype("category")
+    return df
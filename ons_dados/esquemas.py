@@ -0,0 +1,95 @@
+"""Registro dos esquemas (colunas, tipos e formato de data) dos arquivos do ONS.
+
+Os tipos seguem o dicionário de dados da área de Dados Abertos do ONS e as colunas finais seguem a
+definição das tabelas DWTABLE_* do hive_metastore (Seção II do notebook).
+"""
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Esquema:
+    # Colunas de medida (DOUBLE nas tabelas DWTABLE_*), na ordem do arquivo
+    medidas: tuple
+    coluna_data: str
+    # "ISO8601" lê data e hora completas (séries horárias)
+    formato_data: str = "%Y-%m-%d"
+    # Se False, o formato pode casar com apenas parte do texto (ex.: "2001-01-01 00:00:00")
+    data_exata: bool = True
+    # Tipo SQL da coluna Data: TIMESTAMP nas séries horárias, em que a hora faz parte da chave (id_subsistema, Data)
+    tipo_data: str = "DATE"
+    colunas_categoricas: tuple = ("id_subsistema", "nom_subsistema")
+    # Grafias de nom_subsistema no arquivo -> nome padronizado no DW
+    nomes_subsistema: dict = field(default_factory=lambda: {
+        "SUDESTE": "Sudeste", "SUL": "Sul", "NORDESTE": "Nordeste", "NORTE": "Norte"})
+    # Medidas sem as quais a linha é descartada
+    medidas_obrigatorias: tuple = ()
+    # Casas decimais das medidas nos arquivos do ONS (as seguintes são ruído de conversão)
+    decimais: int = 4
+
+    def colunas_arquivo(self):
+        """Colunas do .csv do ONS, na ordem do arquivo."""
+        return ["id_subsistema", "nom_subsistema", self.coluna_data] + list(self.medidas)
+
+    def converter_data(self, serie):
+        """Converte a coluna de data do arquivo (texto) para datetime, no formato do esquema."""
+        if self.formato_data == "ISO8601":
+            # O pandas não aceita ``exact`` com o formato ISO8601, que já exige o texto completo
+            return pd.to_datetime(serie, format="ISO8601")
+        return pd.to_datetime(serie, format=self.formato_data, exact=self.data_exata)
+
+    def dtypes(self, float32=False):
+        """Tipos explícitos para o ``pd.read_csv`` (a coluna de data é convertida logo após a leitura)."""
+        tipos = {coluna: "category" for coluna in self.colunas_categoricas}
+        tipos.update({coluna: "float32" if float32 else "float64" for coluna in self.medidas})
+        return tipos
+
+    def colunas_dw(self):
+        """Colunas e tipos SQL das tabelas DWTABLE_*, na ordem do CREATE TABLE."""
+        return ([("id_subsistema", "STRING"), ("Subsistema", "STRING"), ("Data", self.tipo_data)]
+                + [(coluna, "DOUBLE") for coluna in self.medidas])
+
+
+ESQUEMAS = {
+    "ena": Esquema(
+        medidas=("ena_bruta_regiao_mwmed", "ena_bruta_regiao_percentualmlt",
+                 "ena_armazenavel_regiao_mwmed", "ena_armazenavel_regiao_percentualmlt"),
+        coluna_data="ena_data",
+    ),
+    "ear": Esquema(
+        medidas=("ear_max_subsistema", "ear_verif_subsistema_mwmes", "ear_verif_subsistema_percentual"),
+        coluna_data="ear_data",
+    ),
+    "carga": Esquema(
+        medidas=("val_cargaenergiamwmed",),
+        coluna_data="din_instante",
+        data_exata=False,
+        nomes_subsistema={"Sudeste/Centro-Oeste": "Sudeste", "SUL": "Sul", "NORDESTE": "Nordeste", "NORTE": "Norte"},
+        medidas_obrigatorias=("val_cargaenergiamwmed",),
+    ),
+    # Curva de carga horária: uma linha por hora e subsistema, gravada em tabela própria (chave com a hora)
+    "carga_horaria": Esquema(
+        medidas=("val_cargaenergiahomwmed",),
+        coluna_data="din_instante",
+        formato_data="ISO8601",
+        tipo_data="TIMESTAMP",
+        nomes_subsistema={"Sudeste/Centro-Oeste": "Sudeste", "SUL": "Sul", "NORDESTE": "Nordeste", "NORTE": "Norte"},
+        medidas_obrigatorias=("val_cargaenergiahomwmed",),
+    ),
+    # CMO semanal: a data é o início da semana operativa; os valores valem para todos os dias da semana
+    "cmo": Esquema(
+        medidas=("val_cmomediasemanal", "val_cmoleve", "val_cmomedia", "val_cmopesada"),
+        coluna_data="din_instante",
+        data_exata=False,
+        medidas_obrigatorias=("val_cmomediasemanal",),
+    ),
+}
+
+
+def validar_contrato(df, dataset):
+    """Confere se ``df`` (já tratado) tem exatamente as colunas da DWTABLE_* correspondente, na mesma ordem."""
+    esperadas = [coluna for coluna, _tipo in ESQUEMAS[dataset].colunas_dw()]
+    if list(df.columns) != esperadas:
+        raise ValueError(f"Colunas de {dataset} {list(df.columns)} diferem do contrato da tabela: {esperadas}")
@@ -0,0 +1,29 @@
+"""Endereços dos arquivos anuais disponibilizados na área de Dados Abertos do ONS."""
+
+URL_BASE_DL = "https://ons-dl-prod-opendata.s3.amazonaws.com/dataset/"
+URL_BASE_AWS = "https://ons-aws-prod-opendata.s3.amazonaws.com/dataset/"
+# Atraso máximo usual entre o fim de um dia e a sua publicação pelo ONS (maior na virada de ano)
+DIAS_ATRASO_PUBLICACAO = 5
+
+# Pasta e prefixo do arquivo anual de cada grandeza.
+# A Carga dos anos fechados fica em outro bucket (ons-aws); o ano vigente fica no bucket ons-dl, como as demais grandezas.
+DATASETS = {
+    "ena": {"pasta": "ena_subsistema_di", "prefixo": "ENA_DIARIO_SUBSISTEMA_", "base_anos_fechados": URL_BASE_DL},
+    "ear": {"pasta": "ear_subsistema_di", "prefixo": "EAR_DIARIO_SUBSISTEMA_", "base_anos_fechados": URL_BASE_DL},
+    "carga": {"pasta": "carga_energia_di", "prefixo": "CARGA_ENERGIA_", "base_anos_fechados": URL_BASE_AWS},
+    "cmo": {"pasta": "cmo_se", "prefixo": "CMO_SEMANAL_", "base_anos_fechados": URL_BASE_DL},
+    # Curva de carga horária: todos os anos ficam no bucket ons-aws
+    "carga_horaria": {"pasta": "curva-carga-ho", "prefixo": "CURVA_CARGA_", "base_anos_fechados": URL_BASE_AWS,
+                      "base_ano_vigente": URL_BASE_AWS},
+}
+
+
+def url_ano(dataset, ano, ano_fim, base_url=None):
+    """Monta a URL do arquivo .csv de ``dataset`` para ``ano``.
+
+    ``base_url`` substitui os buckets do ONS (por exemplo, por um servidor HTTP local de testes).
+    """
+    fonte = DATASETS[dataset]
+    if base_url is None:
+        base_url = fonte["base_anos_fechados"] if ano < ano_fim else fonte.get("base_ano_vigente", URL_BASE_DL)
+    return base_url + fonte["pasta"] + "/" + fonte["prefixo"] + str(ano) + ".csv"
@@ -0,0 +1,170 @@
+"""Métricas de execução do pipeline: tempo, bytes, linhas e memória de cada etapa.
+
+Uma instância de ``Metricas`` acompanha uma atualização completa; cada etapa (download de um arquivo,
+leitura, tratamento, carga no Hive...) gera um registro, que pode ser exportado em JSON, como DataFrame
+ou para a tabela DWTABLE_METRICAS, permitindo atribuir uma regressão a uma etapa e a um ano específicos.
+
+O pico de memória de uma etapa é o da própria etapa: no Linux, o pico de memória residente do processo
+(VmHWM) é zerado no início do bloco medido e lido no fim. Com etapas simultâneas no mesmo processo (threads),
+o pico só é zerado quando nenhuma outra etapa está em andamento, e o valor registrado cobre também a parte
+delas que se sobrepõe à etapa.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Etapas medidas em andamento neste processo (de qualquer instância de Metricas), para não zerar o pico no meio
+# de outra
+_etapas_ativas = 0
+_trava_pico = threading.Lock()
+
+
+def _reiniciar_apos_fork():
+    # Um processo filho (ProcessPoolExecutor) não herda as etapas em andamento nas threads do pai
+    global _etapas_ativas, _trava_pico
+    _etapas_ativas = 0
+    _trava_pico = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+CAMPOS = ("execucao", "etapa", "dataset", "ano", "inicio", "segundos", "bytes", "linhas_entrada", "linhas_saida",
+          "memoria_mib", "pico_memoria_mib", "detalhe")
+
+
+def colunas_metricas():
+    """Colunas e tipos SQL da tabela DWTABLE_METRICAS."""
+    tipos = {"ano": "INT", "inicio": "TIMESTAMP", "segundos": "DOUBLE", "bytes": "BIGINT", "linhas_entrada": "BIGINT",
+             "linhas_saida": "BIGINT", "memoria_mib": "DOUBLE", "pico_memoria_mib": "DOUBLE"}
+    return [(campo, tipos.get(campo, "STRING")) for campo in CAMPOS]
+
+
+def memoria_mib():
+    """Memória residente atual do processo (Linux), em MiB; ``None`` se indisponível."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def zerar_pico_memoria():
+    """Zera o pico de memória residente do processo (Linux); retorna ``False`` se não for possível."""
+    try:
+        with open("/proc/self/clear_refs", "w") as arquivo:
+            arquivo.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def pico_memoria_mib():
+    """Maior memória residente atingida pelo processo desde o último ``zerar_pico_memoria``, em MiB.
+
+    Sem /proc (fora do Linux), é o pico desde o início do processo; ``None`` se indisponível.
+    """
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss é informado em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Metricas:
+    """Registros de uma execução do pipeline; seguro para uso a partir de várias threads."""
+
+    def __init__(self, execucao=None):
+        self.execucao = execucao or uuid.uuid4().hex[:12]
+        self.registros = []
+        self._trava = threading.Lock()
+
+    def registrar(self, etapa, dataset=None, ano=None, segundos=None, inicio=None, **valores):
+        """Acrescenta um registro já medido (ex.: o download de um arquivo, cronometrado na própria thread).
+
+        O pico de memória só é preenchido se informado em ``valores`` (``etapa`` o mede no próprio bloco).
+        """
+        registro = dict.fromkeys(CAMPOS)
+        registro.update(execucao=self.execucao, etapa=etapa, dataset=dataset, ano=ano, segundos=segundos,
+                        inicio=inicio or time.time(), memoria_mib=memoria_mib())
+        registro.update(valores)
+        with self._trava:
+            self.registros.append(registro)
+        return registro
+
+    def acrescentar(self, registros):
+        """Acrescenta registros medidos em outro processo (com uma instância própria de ``Metricas``)."""
+        with self._trava:
+            self.registros.extend(registros)
+
+    @contextmanager
+    def etapa(self, etapa, dataset=None, ano=None, **valores):
+        """Cronometra o bloco ``with`` e mede o seu pico de memória; o registro retornado pode receber
+        ``linhas_saida``, ``bytes`` etc."""
+        global _etapas_ativas
+        with _trava_pico:
+            if _etapas_ativas == 0:
+                zerar_pico_memoria()
+            _etapas_ativas += 1
+        try:
+            inicio = time.time()
+            relogio = time.perf_counter()
+            registro = dict(valores)
+            yield registro
+            segundos = time.perf_counter() - relogio
+            registro.setdefault("pico_memoria_mib", pico_memoria_mib())
+        finally:
+            with _trava_pico:
+                _etapas_ativas -= 1
+        self.registrar(etapa, dataset, ano, segundos, inicio, **registro)
+
+    def para_dataframe(self):
+        with self._trava:
+            df = pd.DataFrame(self.registros, columns=list(CAMPOS))
+        df["inicio"] = pd.to_datetime(df["inicio"], unit="s")
+        return df
+
+    def resumo(self):
+        """Tempo total, linhas e pico de memória por etapa e dataset, da etapa mais lenta à mais rápida."""
+        return (self.para_dataframe()
+                .groupby(["etapa", "dataset"], dropna=False)
+                .agg(segundos=("segundos", "sum"), execucoes=("segundos", "size"), bytes=("bytes", "sum"),
+                     linhas_saida=("linhas_saida", "sum"), pico_memoria_mib=("pico_memoria_mib", "max"))
+                .sort_values(by="segundos", ascending=False))
+
+    def exportar_json(self, caminho):
+        """Grava os registros em ``caminho`` no formato JSON Lines (um registro por linha)."""
+        with self._trava:
+            registros = list(self.registros)
+        with open(caminho, "a", encoding="utf8") as arquivo:
+            for registro in registros:
+                arquivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+
+def medir(metricas, etapa, dataset=None, ano=None, **valores):
+    """``metricas.etapa(...)`` quando há métricas; caso contrário, um bloco sem medição."""
+    if metricas is None:
+        return _sem_medicao()
+    return metricas.etapa(etapa, dataset, ano, **valores)
+
+
+@contextmanager
+def _sem_medicao():
+    yield {}
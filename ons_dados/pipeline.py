@@ -0,0 +1,288 @@
+"""Atualização dos dados do ONS como rotina de biblioteca, sem depender do notebook.
+
+``atualizar`` executa o mesmo fluxo do notebook (download, tratamento, revisões, armazenamento Parquet,
+tabela diária, agregados e carga no Hive) para um subconjunto de datasets e um intervalo de anos. A sessão
+Spark é recebida como parâmetro: sem ela, a carga no Hive é omitida e nada do Spark é importado, o que
+permite agendar a atualização como um job leve, fora do Databricks.
+
+As etapas formam um DAG (ver ``agendador.py``): download → leitura e tratamento de cada dataset rodam em
+paralelo, e a tabela diária, os agregados e as cargas começam assim que as suas entradas ficam prontas.
+Com o armazenamento Parquet, as etapas cujas entradas não mudaram desde a última atualização são puladas.
+"""
+
+import datetime
+import functools
+import os
+import threading
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from ons_dados.agendador import Agendador
+from ons_dados.agregados import atualizar_agregados
+from ons_dados.armazenamento import gravar_parquet, ler_parquet
+from ons_dados.cache import hash_conteudo
+from ons_dados.consolidacao import DATASETS_DIARIOS, INDICE, colunas_diaria, montar_tabela_diaria
+from ons_dados.download import baixar_anos, montar_dataset
+from ons_dados.esquemas import validar_contrato
+from ons_dados.metricas import Metricas, medir
+from ons_dados.revisoes import colunas_alteracoes, detectar_alteracoes
+from ons_dados.tratamento import tratar
+from ons_dados.warehouse import BANCO, VISOES, carregar_tabela, inserir_tabela, sql_criar_tabela
+
+ANO_ZERO = 2001
+DATASETS = ("ena", "ear", "carga", "cmo")
+ESTADO = "estado_atualizacao.json"
+
+
+def ano_vigente(atraso_dias=5, hoje=None):
+    """Último ano publicado, considerando um possível atraso de até ``atraso_dias`` na publicação (comum na virada de ano)."""
+    hoje = hoje or datetime.datetime.now()
+    return (hoje - datetime.timedelta(days=atraso_dias)).year
+
+
+@dataclass
+class Atualizacao:
+    """Resultado de ``atualizar``: os DataFrames tratados e as tabelas derivadas desta atualização."""
+
+    ano_inicio: int
+    ano_fim: int
+    series: dict = field(default_factory=dict)
+    alteracoes: pd.DataFrame = None
+    tabela: pd.DataFrame = None
+    medias_moveis: pd.DataFrame = None
+    mensal: pd.DataFrame = None
+    metricas: Metricas = None
+    # Tarefas do DAG puladas por não terem novas entradas (ex.: "tratar_ena"); os seus resultados, quando
+    # necessários, foram lidos do armazenamento
+    puladas: set = field(default_factory=set)
+
+
+def _serie_armazenada(dataset, diretorio, ano_inicio, ano_fim):
+    """Recorte de um dataset fora desta atualização, lido do armazenamento Parquet (``None`` se não houver)."""
+    if diretorio is None or not os.path.isdir(os.path.join(diretorio, dataset)):
+        return None
+    # O CMO entra pela semana operativa vigente: a semana que cobre 1º de janeiro começa no ano anterior
+    data_inicio = pd.Timestamp(year=ano_inicio, month=1, day=1) - pd.Timedelta(days=7 if dataset == "cmo" else 0)
+    return ler_parquet(dataset, diretorio, data_inicio=data_inicio, data_fim=pd.Timestamp(year=ano_fim, month=12, day=31))
+
+
+def _com_historico(tabela, diretorio, ano_inicio):
+    """Antecede ``tabela`` com o ano anterior já armazenado, base das médias móveis e da variação anual."""
+    if not os.path.isdir(os.path.join(diretorio, "diaria")):
+        return tabela
+    anterior = ler_parquet("diaria", diretorio, data_inicio=pd.Timestamp(year=ano_inicio - 1, month=1, day=1),
+                           data_fim=pd.Timestamp(year=ano_inicio - 1, month=12, day=31))
+    if anterior.empty:
+        return tabela
+    anterior = anterior.set_index(["Subsistema", "Data"])[tabela.columns]
+    completa = pd.concat([anterior, tabela])
+    completa["id_subsistema"] = completa["id_subsistema"].astype("category")
+    return completa.sort_index()
+
+
+def carregar_visao(spark, dataset, df, modo_carga="upsert", dias_recarga=None, banco=BANCO, metricas=None):
+    """Cria a visão DW_* do dataset a partir de ``df`` e a carrega na tabela DWTABLE_* (criada se não existir).
+
+    As tabelas de registro (alterações e métricas) recebem INSERT INTO; as demais, ``carregar_tabela``.
+    """
+    # DataFrames vazios (ex.: nenhuma alteração detectada) não têm o que carregar
+    if df is None or df.empty:
+        return
+    with medir(metricas, "createDataFrame", dataset, linhas_entrada=len(df)):
+        spark.createDataFrame(df).createOrReplaceTempView(VISOES[dataset])
+    spark.sql(sql_criar_tabela(dataset, banco))
+    if dataset in ("alteracoes", "metricas"):
+        inserir_tabela(spark, dataset, banco=banco, metricas=metricas)
+    else:
+        carregar_tabela(spark, dataset, modo_carga, dias_recarga, banco=banco, metricas=metricas)
+
+
+# Tarefas do DAG: recebem os resultados das dependências, na ordem, e as métricas (ver Agendador)
+
+def _baixar(dataset, ano_inicio, ano_fim, workers, base_url, cache, revalidar_fechados, limite, metricas):
+    return baixar_anos([dataset], ano_inicio, ano_fim, workers=workers, base_url=base_url, cache=cache,
+                       revalidar_fechados=revalidar_fechados, limite=limite, metricas=metricas)
+
+
+def _impressao_arquivos(arquivos):
+    return [[ano, hash_conteudo(arquivo.conteudo)] for (_dataset, ano), arquivo in sorted(arquivos.items())]
+
+
+def _tratar(arquivos, dataset, ano_inicio, ano_fim, float32, engine, metricas):
+    df = tratar(montar_dataset(arquivos, dataset, ano_inicio, ano_fim, float32, engine, metricas), dataset, metricas)
+    validar_contrato(df, dataset)
+    return df
+
+
+def _armazenada(dataset, diretorio, ano_inicio, ano_fim, metricas):
+    with metricas.etapa("ler_parquet", dataset) as registro:
+        df = _serie_armazenada(dataset, diretorio, ano_inicio, ano_fim)
+        registro["linhas_saida"] = len(df)
+    return df
+
+
+def _impressao_df(df):
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+def _revisoes(df, dataset, diretorio, anos, metricas):
+    with metricas.etapa("revisoes", dataset, linhas_entrada=len(df)) as registro:
+        alteracoes = detectar_alteracoes(df, dataset, diretorio, anos=anos)
+        registro["linhas_saida"] = len(alteracoes)
+    return alteracoes
+
+
+def _gravar(df, dataset, diretorio, metricas):
+    with metricas.etapa("gravar_parquet", dataset, linhas_entrada=len(df)):
+        gravar_parquet(df, dataset, diretorio)
+
+
+def _tabela_diaria(ena, earm, carga, cmo, metricas):
+    with metricas.etapa("tabela_diaria", "diaria") as registro:
+        tabela, _descartados = montar_tabela_diaria(ena, earm, carga, cmo)
+        registro["linhas_saida"] = len(tabela)
+    return tabela
+
+
+def _tabela_armazenada(diretorio, ano_inicio, ano_fim):
+    tabela = ler_parquet("diaria", diretorio, data_inicio=pd.Timestamp(year=ano_inicio, month=1, day=1),
+                         data_fim=pd.Timestamp(year=ano_fim, month=12, day=31))
+    tabela["id_subsistema"] = tabela["id_subsistema"].astype("category")
+    return tabela.set_index(INDICE).sort_index()
+
+
+def _agregados(tabela, diretorio, ano_inicio, metricas):
+    with metricas.etapa("agregados", "diaria"):
+        medias_moveis, mensal, _data_inicio = atualizar_agregados(_com_historico(tabela, diretorio, ano_inicio),
+                                                                  diretorio)
+    return medias_moveis, mensal
+
+
+def _carregar(df, dataset, spark, modo_carga, dias_recarga, banco, metricas):
+    carregar_visao(spark, dataset, df, modo_carga, dias_recarga, banco, metricas)
+
+
+def _carregar_diaria(tabela, spark, modo_carga, dias_recarga, banco, metricas):
+    diaria = tabela.reset_index()[[coluna for coluna, _tipo in colunas_diaria()]]
+    carregar_visao(spark, "diaria", diaria, modo_carga, dias_recarga, banco, metricas)
+
+
+def _carregar_agregados(agregados, spark, modo_carga, banco, metricas):
+    for dataset, df in zip(("medias_moveis", "mensal"), agregados):
+        carregar_visao(spark, dataset, df, modo_carga, None, banco, metricas)
+
+
+def _carregar_alteracoes(*alteracoes, spark, banco, metricas):
+    alteracoes = [df for df in alteracoes if df is not None]
+    if alteracoes:
+        carregar_visao(spark, "alteracoes", pd.concat(alteracoes, ignore_index=True), banco=banco, metricas=metricas)
+
+
+def montar_dag(datasets, ano_inicio, ano_fim, workers=16, cache=None, diretorio=None, spark=None, modo_carga="upsert",
+               dias_recarga=None, banco=BANCO, base_url=None, engine="pyarrow", float32=False, processos=None,
+               threads=None, revalidar_fechados=False):
+    """Agendador com as tarefas da atualização (os parâmetros são os de ``atualizar``)."""
+    estado = os.path.join(diretorio, ESTADO) if diretorio is not None else None
+    agendador = Agendador(processos, threads, estado)
+    parcial = functools.partial
+    anos = range(ano_inicio, ano_fim + 1)
+    carga_hive = f"{modo_carga}|{dias_recarga}|{banco}"
+    # Os datasets são baixados em paralelo, mas somam no máximo ``workers`` conexões com o ONS
+    limite = threading.BoundedSemaphore(workers)
+
+    for dataset in datasets:
+        agendador.adicionar(f"baixar_{dataset}",
+                            parcial(_baixar, dataset, ano_inicio, ano_fim, workers, base_url, cache, revalidar_fechados,
+                                    limite),
+                            sempre=True, impressao=_impressao_arquivos)
+        agendador.adicionar(f"tratar_{dataset}",
+                            parcial(_tratar, dataset=dataset, ano_inicio=ano_inicio, ano_fim=ano_fim, float32=float32,
+                                    engine=engine),
+                            [f"baixar_{dataset}"], processo=True, chave=f"{float32}|{engine}",
+                            recuperar=(parcial(_serie_armazenada, dataset, diretorio, ano_inicio, ano_fim)
+                                       if diretorio is not None else None))
+        if diretorio is not None:
+            agendador.adicionar(f"revisoes_{dataset}", parcial(_revisoes, dataset=dataset, diretorio=diretorio, anos=anos),
+                                [f"tratar_{dataset}"])
+            agendador.adicionar(f"parquet_{dataset}", parcial(_gravar, dataset=dataset, diretorio=diretorio),
+                                [f"tratar_{dataset}"])
+        if spark is not None:
+            agendador.adicionar(f"hive_{dataset}",
+                                parcial(_carregar, dataset=dataset, spark=spark, modo_carga=modo_carga,
+                                        dias_recarga=dias_recarga, banco=banco),
+                                [f"tratar_{dataset}"], chave=carga_hive)
+
+    # Os datasets fora desta atualização entram na tabela diária pelo que já está armazenado
+    entradas = []
+    for dataset in DATASETS_DIARIOS + ("cmo",):
+        if dataset in datasets:
+            entradas.append(f"tratar_{dataset}")
+        elif diretorio is not None and os.path.isdir(os.path.join(diretorio, dataset)):
+            agendador.adicionar(f"armazenada_{dataset}",
+                                parcial(_armazenada, dataset, diretorio, ano_inicio, ano_fim),
+                                sempre=True, impressao=_impressao_df)
+            entradas.append(f"armazenada_{dataset}")
+    # A tabela diária só é montada (e regravada) quando há todas as séries, para não gravar colunas nulas
+    if len(entradas) == len(DATASETS_DIARIOS) + 1:
+        agendador.adicionar("tabela_diaria", _tabela_diaria, entradas, processo=True,
+                            recuperar=(parcial(_tabela_armazenada, diretorio, ano_inicio, ano_fim)
+                                       if diretorio is not None else None))
+        if diretorio is not None:
+            agendador.adicionar("agregados", parcial(_agregados, diretorio=diretorio, ano_inicio=ano_inicio),
+                                ["tabela_diaria"])
+        if spark is not None:
+            agendador.adicionar("hive_diaria",
+                                parcial(_carregar_diaria, spark=spark, modo_carga=modo_carga, dias_recarga=dias_recarga,
+                                        banco=banco),
+                                ["tabela_diaria"], chave=carga_hive)
+            if diretorio is not None:
+                agendador.adicionar("hive_agregados",
+                                    parcial(_carregar_agregados, spark=spark, modo_carga=modo_carga, banco=banco),
+                                    ["agregados"], chave=carga_hive)
+    if spark is not None and diretorio is not None:
+        agendador.adicionar("hive_alteracoes", parcial(_carregar_alteracoes, spark=spark, banco=banco),
+                            [f"revisoes_{dataset}" for dataset in datasets], chave=banco)
+    return agendador
+
+
+def atualizar(datasets=DATASETS, ano_inicio=ANO_ZERO, ano_fim=None, workers=16, cache=None, diretorio=None, spark=None,
+              modo_carga="upsert", dias_recarga=None, banco=BANCO, base_url=None, engine="pyarrow", float32=False,
+              metricas=None, processos=None, threads=None, revalidar_fechados=False):
+    """Atualiza ``datasets`` de ``ano_inicio`` a ``ano_fim`` (padrão: o ano vigente) e retorna uma ``Atualizacao``.
+
+    Com ``diretorio``, as revisões do ONS são detectadas e as séries, a tabela diária e os agregados são
+    gravados no armazenamento Parquet; os datasets fora de ``datasets`` são lidos de lá para montar a tabela
+    diária, e as etapas cujas entradas não mudaram desde a última atualização são puladas (listadas em
+    ``Atualizacao.puladas``; os seus resultados só aparecem se lidos do armazenamento para uma etapa seguinte).
+    Com ``spark``, o resultado é carregado no Hive (MERGE, ou INSERT OVERWRITE com ``modo_carga="completa"``,
+    que só é aceito quando todo o histórico é atualizado).
+
+    ``workers`` é o total de downloads simultâneos, somados todos os datasets. ``processos`` limita os processos usados na leitura, no tratamento e na junção (padrão: um por núcleo;
+    0 executa tudo em sequência no processo atual) e ``threads``, as tarefas de E/S simultâneas.
+    ``revalidar_fechados=True`` confere no servidor, por requisição condicional, também os anos fechados do cache.
+    """
+    ano_fim = ano_fim or ano_vigente()
+    if modo_carga == "completa" and ano_inicio > ANO_ZERO:
+        raise ValueError("A carga completa regrava todo o histórico; use modo_carga='upsert' em atualizações parciais")
+    metricas = metricas if metricas is not None else Metricas()
+    if spark is not None:
+        spark.sql(f"CREATE DATABASE IF NOT EXISTS {banco}")
+
+    agendador = montar_dag(datasets, ano_inicio, ano_fim, workers, cache, diretorio, spark, modo_carga, dias_recarga,
+                           banco, base_url, engine, float32, processos, threads, revalidar_fechados)
+    resultados = agendador.executar(metricas)
+
+    atualizacao = Atualizacao(ano_inicio, ano_fim, metricas=metricas, puladas=set(agendador.puladas))
+    atualizacao.series = {dataset: resultados[f"tratar_{dataset}"] for dataset in datasets
+                          if resultados[f"tratar_{dataset}"] is not None}
+    if diretorio is not None:
+        atualizacao.alteracoes = pd.concat(
+            [resultados[f"revisoes_{dataset}"] for dataset in datasets if resultados[f"revisoes_{dataset}"] is not None]
+            or [pd.DataFrame(columns=[coluna for coluna, _tipo in colunas_alteracoes()])], ignore_index=True)
+    atualizacao.tabela = resultados.get("tabela_diaria")
+    if resultados.get("agregados") is not None:
+        atualizacao.medias_moveis, atualizacao.mensal = resultados["agregados"]
+    if spark is not None:
+        carregar_visao(spark, "metricas", metricas.para_dataframe(), banco=banco)
+    return atualizacao
@@ -0,0 +1,140 @@
+"""Detecção das revisões feitas pelo ONS em dados já publicados (change data capture).
+
+Cada linha recebe um hash dos seus valores e cada grupo (dataset, ano, subsistema) recebe uma impressão
+digital, a soma (módulo 2^64) dos hashes das suas linhas. Em uma atualização, as impressões são comparadas
+primeiro; apenas nos grupos cuja impressão mudou os hashes linha a linha são lidos do disco e comparados,
+de modo que o custo da comparação acompanha o volume alterado, e não o tamanho do histórico.
+
+No diretório do armazenamento Parquet ficam ``hashes_<dataset>/`` (hash de cada linha, particionado como os
+dados), ``impressoes_<dataset>.parquet`` e ``alteracoes/`` (registro das alterações detectadas).
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from ons_dados.armazenamento import PARTICIONAMENTO, gravar_parquet
+from ons_dados.esquemas import ESQUEMAS
+
+CHAVE = ["id_subsistema", "Data"]
+GRUPO = ["ano", "Subsistema"]
+
+
+def colunas_alteracoes():
+    """Colunas e tipos SQL da tabela DWTABLE_ALTERACOES."""
+    return [("dataset", "STRING"), ("tipo", "STRING"), ("id_subsistema", "STRING"), ("Subsistema", "STRING"),
+            ("Data", "DATE"), ("hash_anterior", "BIGINT"), ("hash_atual", "BIGINT"), ("detectado_em", "TIMESTAMP")]
+
+
+def hash_linhas(df, dataset):
+    """Hash de 64 bits dos valores de cada linha, independente da precisão (float32/64) e da unidade da data.
+
+    As medidas são comparadas em float64, arredondadas às casas decimais do esquema (o que absorve a diferença
+    de último dígito entre leitores de CSV sem perder revisões de 0,01 em valores grandes). Medidas em float32
+    voltam antes à sua representação decimal mais curta, que é o valor publicado pelo ONS. O hash é retornado
+    como inteiro com sinal (int64), o tipo BIGINT do Hive.
+    """
+    esquema = ESQUEMAS[dataset]
+    medidas = list(esquema.medidas)
+    normalizado = pd.DataFrame({
+        coluna: (df[coluna].astype(str) if df[coluna].dtype == "float32" else df[coluna]).astype("float64")
+        for coluna in medidas}, index=df.index).round(esquema.decimais)
+    normalizado["id_subsistema"] = df["id_subsistema"].astype(str).to_numpy()
+    normalizado["Subsistema"] = df["Subsistema"].astype(str).to_numpy()
+    # Séries diárias são comparadas pelo dia (qualquer que seja a unidade); as horárias, pelo instante
+    unidade = "datetime64[D]" if esquema.tipo_data == "DATE" else "datetime64[s]"
+    normalizado["Data"] = df["Data"].to_numpy().astype(unidade).astype("int64")
+    return pd.util.hash_pandas_object(normalizado, index=False).to_numpy().view("int64")
+
+
+def _impressoes(hashes):
+    return hashes.groupby(GRUPO, observed=True).agg(impressao=("hash", "sum"), linhas=("hash", "size")).reset_index()
+
+
+def _caminho_impressoes(diretorio, dataset):
+    return os.path.join(diretorio, f"impressoes_{dataset}.parquet")
+
+
+def _ler_hashes(diretorio, dataset, grupos):
+    caminho = os.path.join(diretorio, f"hashes_{dataset}")
+    if grupos.empty or not os.path.isdir(caminho):
+        return None
+    filtro = None
+    for ano, subsistema in grupos[GRUPO].itertuples(index=False):
+        condicao = (ds.field("ano") == int(ano)) & (ds.field("Subsistema") == str(subsistema))
+        filtro = condicao if filtro is None else filtro | condicao
+    tabela = ds.dataset(caminho, format="parquet", partitioning=PARTICIONAMENTO).to_table(filter=filtro)
+    return tabela.to_pandas()
+
+
+def detectar_alteracoes(df, dataset, diretorio, detectado_em=None, anos=None):
+    """Compara ``df`` (já tratado) com os hashes gravados na atualização anterior e retorna o registro de alterações.
+
+    O registro tem uma linha por (id_subsistema, Data) incluído, revisado ou excluído desde a atualização
+    anterior e também é acrescentado a ``alteracoes/``. Os hashes e impressões gravados são atualizados apenas
+    nos grupos alterados. Na primeira execução, todas as linhas são registradas como inclusões.
+    Com ``anos`` (atualização parcial), apenas esses anos são comparados: os grupos gravados dos demais anos
+    são mantidos e não são considerados excluídos.
+    """
+    detectado_em = pd.Timestamp(detectado_em if detectado_em is not None else pd.Timestamp.now()).floor("s")
+    hashes = pd.DataFrame({
+        "id_subsistema": df["id_subsistema"].astype(str).to_numpy(),
+        "Subsistema": df["Subsistema"].astype(str).to_numpy(),
+        "Data": df["Data"].to_numpy(),
+        "hash": hash_linhas(df, dataset),
+    })
+    hashes["ano"] = hashes["Data"].dt.year
+    atuais = _impressoes(hashes)
+
+    caminho_impressoes = _caminho_impressoes(diretorio, dataset)
+    if os.path.exists(caminho_impressoes):
+        anteriores = pd.read_parquet(caminho_impressoes)
+    else:
+        anteriores = atuais.iloc[:0]
+    fora_do_recorte = anteriores.iloc[:0]
+    if anos is not None:
+        no_recorte = anteriores["ano"].isin(list(anos))
+        fora_do_recorte, anteriores = anteriores[~no_recorte], anteriores[no_recorte]
+    comparacao = atuais.merge(anteriores, on=GRUPO, how="outer", suffixes=("", "_anterior"))
+    alterados = comparacao[(comparacao["impressao"] != comparacao["impressao_anterior"])
+                           | (comparacao["linhas"] != comparacao["linhas_anterior"])][GRUPO]
+
+    antes = _ler_hashes(diretorio, dataset, alterados)
+    depois = hashes.merge(alterados, on=GRUPO)
+    if antes is None:
+        antes = depois.iloc[:0]
+    antes = antes.assign(ano=antes["ano"].astype("int64"), Subsistema=antes["Subsistema"].astype(str))
+    # Int64 (com nulos) evita que o merge externo converta os hashes para float, perdendo bits
+    pares = depois.astype({"hash": "Int64"}).merge(
+        antes[CHAVE + ["Subsistema", "hash"]].astype({"hash": "Int64"}), on=CHAVE, how="outer",
+        suffixes=("_atual", "_anterior"), indicator=True)
+    pares = pares[(pares["hash_atual"] != pares["hash_anterior"]).fillna(True).astype(bool)]
+    tipo = np.select([pares["_merge"] == "left_only", pares["_merge"] == "right_only"],
+                     ["inclusao", "exclusao"], default="revisao")
+    alteracoes = pd.DataFrame({
+        "dataset": dataset,
+        "tipo": tipo,
+        "id_subsistema": pares["id_subsistema"].to_numpy(),
+        "Subsistema": pares["Subsistema_atual"].fillna(pares["Subsistema_anterior"]).to_numpy(),
+        "Data": pares["Data"].to_numpy(),
+        "hash_anterior": pares["hash_anterior"].array,
+        "hash_atual": pares["hash_atual"].array,
+        "detectado_em": detectado_em,
+    })
+
+    # Atualiza os hashes apenas nos grupos alterados (grupos que deixaram de existir têm a partição removida)
+    if not alterados.empty:
+        gravar_parquet(depois[["id_subsistema", "Subsistema", "Data", "hash"]], f"hashes_{dataset}", diretorio)
+        existentes = set(map(tuple, atuais[GRUPO].itertuples(index=False)))
+        for ano, subsistema in alterados.itertuples(index=False):
+            if (ano, subsistema) not in existentes:
+                shutil.rmtree(os.path.join(diretorio, f"hashes_{dataset}", f"ano={ano}", f"Subsistema={subsistema}"),
+                              ignore_errors=True)
+        pd.concat([fora_do_recorte, atuais], ignore_index=True).to_parquet(caminho_impressoes, index=False)
+    alteracoes = alteracoes.sort_values(by=["Data", "id_subsistema"], ignore_index=True)
+    if not alteracoes.empty:
+        gravar_parquet(alteracoes, "alteracoes", diretorio, sufixo=f"{dataset}-{detectado_em:%Y%m%d%H%M%S}")
+    return alteracoes
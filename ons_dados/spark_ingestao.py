@@ -0,0 +1,61 @@
+"""Leitura dos .csv do ONS diretamente pelo Spark, sem passar por DataFrames pandas no driver.
+
+O esquema dos arquivos é montado a partir do registro de esquemas e o tratamento (padronização dos nomes
+de subsistema, renomeação das colunas e conversão da data) é feito com expressões de coluna do Spark,
+resultando nas mesmas colunas das tabelas DWTABLE_*.
+"""
+
+from itertools import chain
+
+from pyspark.sql import functions as F
+from pyspark.sql.types import DoubleType, StringType, StructField, StructType
+
+from ons_dados.esquemas import ESQUEMAS
+
+
+def esquema_spark(dataset):
+    """StructType das colunas do .csv (a data é lida como texto e convertida no tratamento)."""
+    esquema = ESQUEMAS[dataset]
+    return StructType(
+        [StructField(coluna, StringType()) for coluna in ("id_subsistema", "nom_subsistema", esquema.coluna_data)]
+        + [StructField(coluna, DoubleType()) for coluna in esquema.medidas])
+
+
+def caminhos_cache(cache, arquivos, dataset, prefixo_local="/dbfs/", prefixo_spark="dbfs:/"):
+    """Caminhos, vistos pelo Spark, dos .csv de ``dataset`` gravados no cache em disco.
+
+    No Databricks o cache fica em /dbfs/..., que os executores acessam como dbfs:/...
+    """
+    caminhos = []
+    for (nome, _ano), arquivo in sorted(arquivos.items()):
+        if nome == dataset:
+            caminho = cache.caminho_conteudo(arquivo.url)
+            if prefixo_local and caminho.startswith(prefixo_local):
+                caminho = prefixo_spark + caminho[len(prefixo_local):]
+            caminhos.append(caminho)
+    return caminhos
+
+
+def tratar_spark(df, dataset):
+    """Padroniza subsistemas, renomeia colunas e converte a data, nas colunas e tipos da DWTABLE_*."""
+    esquema = ESQUEMAS[dataset]
+    nomes = F.create_map([F.lit(valor) for valor in chain(*esquema.nomes_subsistema.items())])
+    data = F.col(esquema.coluna_data)
+    if esquema.tipo_data == "TIMESTAMP":
+        data = F.to_timestamp(data)
+    else:
+        data = F.to_date(F.substring(data, 1, 10) if not esquema.data_exata else data, "yyyy-MM-dd")
+    df = df.select(
+        F.col("id_subsistema"),
+        F.coalesce(nomes[F.col("nom_subsistema")], F.col("nom_subsistema")).alias("Subsistema"),
+        data.alias("Data"),
+        *[F.col(coluna) for coluna in esquema.medidas])
+    if esquema.medidas_obrigatorias:
+        df = df.dropna(subset=list(esquema.medidas_obrigatorias))
+    return df
+
+
+def ler_dataset_spark(spark, dataset, caminhos):
+    """Lê os .csv de ``dataset`` em ``caminhos`` com esquema explícito e retorna o DataFrame Spark já tratado."""
+    df = spark.read.csv(caminhos, schema=esquema_spark(dataset), header=True, sep=";", encoding="UTF-8")
+    return tratar_spark(df, dataset)
@@ -0,0 +1,104 @@
+"""Ingestão em blocos, com memória limitada, para séries longas ou de granularidade fina (ex.: horárias).
+
+Cada arquivo anual é lido em blocos de ``linhas_bloco`` linhas, tratado bloco a bloco e gravado em seguida
+no armazenamento Parquet ou no Hive, de modo que o pico de memória depende do tamanho do bloco e não da
+extensão do histórico. As séries horárias (ex.: ``carga_horaria``) mantêm a hora na coluna Data e têm tabela
+própria, com a hora na chave do MERGE.
+"""
+
+import os
+import urllib.request
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from ons_dados.armazenamento import remover_anos
+from ons_dados.esquemas import ESQUEMAS
+from ons_dados.fontes import url_ano
+from ons_dados.tratamento import tratar
+from ons_dados.warehouse import BANCO, carregar_upsert, sql_criar_tabela
+
+LINHAS_BLOCO = 100_000
+
+
+def abrir_ano(dataset, ano, ano_fim, cache=None, base_url=None, timeout=60):
+    """Abre o .csv de ``dataset`` em ``ano`` para leitura sequencial: do cache em disco, se houver, ou da rede."""
+    url = url_ano(dataset, ano, ano_fim, base_url)
+    if cache is not None and cache.metadados(url) is not None:
+        return open(cache.caminho_conteudo(url), "rb")
+    return urllib.request.urlopen(url, timeout=timeout)
+
+
+def ler_em_blocos(fonte, dataset, linhas_bloco=LINHAS_BLOCO, float32=False, metricas=None):
+    """Gera os blocos já tratados de um .csv do ONS aberto em ``fonte`` (caminho ou arquivo)."""
+    leitor = pd.read_csv(fonte, delimiter=";", encoding="utf8", dtype=ESQUEMAS[dataset].dtypes(float32),
+                         chunksize=linhas_bloco)
+    with leitor:
+        for bloco in leitor:
+            yield tratar(bloco, dataset, metricas)
+
+
+def blocos_dataset(dataset, ano_zero, ano_fim, linhas_bloco=LINHAS_BLOCO, cache=None, base_url=None,
+                   float32=False, metricas=None):
+    """Gera ``(ano, bloco)`` para todos os anos de ``dataset``, um arquivo de cada vez."""
+    for ano in range(ano_zero, ano_fim + 1):
+        with abrir_ano(dataset, ano, ano_fim, cache, base_url) as fonte:
+            for bloco in ler_em_blocos(fonte, dataset, linhas_bloco, float32, metricas):
+                yield ano, bloco
+
+
+def _fechar(gravadores):
+    for gravador in gravadores.values():
+        gravador.close()
+    gravadores.clear()
+    # Devolve ao sistema a memória que o alocador do Arrow retém entre um ano e o seguinte
+    pa.default_memory_pool().release_unused()
+
+
+def gravar_blocos_parquet(blocos, dataset, diretorio):
+    """Grava no armazenamento Parquet os ``(ano, bloco)`` gerados; cada ano tem suas partições substituídas.
+
+    Cada partição (ano, subsistema) recebe um único arquivo, mantido aberto enquanto durar o ano, com um row
+    group por bloco: um ``write_dataset`` por bloco criaria um arquivo por bloco e faria a memória retida pelo
+    alocador crescer com a extensão do histórico.
+    """
+    linhas = 0
+    ano_atual = None
+    gravadores = {}
+    esquema = None
+    try:
+        for ano, bloco in blocos:
+            if ano != ano_atual:
+                _fechar(gravadores)
+                remover_anos(dataset, diretorio, [ano])
+                ano_atual = ano
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            subsistemas = tabela.column("Subsistema")
+            tabela = tabela.drop_columns(["Subsistema"])
+            # O esquema do primeiro bloco vale para todos (os metadados do pandas variam com as categorias do bloco)
+            esquema = esquema or tabela.schema
+            for subsistema in bloco["Subsistema"].unique():
+                parte = tabela.filter(pc.equal(subsistemas, subsistema)).cast(esquema)
+                if subsistema not in gravadores:
+                    pasta = os.path.join(diretorio, dataset, f"ano={ano}", f"Subsistema={subsistema}")
+                    os.makedirs(pasta, exist_ok=True)
+                    gravadores[subsistema] = pq.ParquetWriter(os.path.join(pasta, "part-0.parquet"), esquema)
+                gravadores[subsistema].write_table(parte)
+            linhas += len(bloco)
+    finally:
+        _fechar(gravadores)
+    return linhas
+
+
+def gravar_blocos_hive(spark, blocos, dataset, banco=BANCO):
+    """Carrega os ``(ano, bloco)`` gerados na tabela DWTABLE_* do dataset, um MERGE por bloco."""
+    visao = "DW_" + dataset.upper() + "_BLOCO"
+    spark.sql(sql_criar_tabela(dataset, banco))
+    linhas = 0
+    for _ano, bloco in blocos:
+        spark.createDataFrame(bloco).createOrReplaceTempView(visao)
+        carregar_upsert(spark, dataset, visao, banco=banco)
+        linhas += len(bloco)
+    return linhas
@@ -0,0 +1,81 @@
+"""Tratamento comum aos DataFrames de ENA, EAR e Carga, orientado pelo registro de esquemas.
+
+Etapas, na ordem: padronização dos nomes de subsistema (sobre os códigos da coluna categórica), renomeação
+das colunas para o padrão do DW, conversão da data (apenas se ainda não convertida na leitura), descarte das
+linhas sem as medidas obrigatórias e ordenação cronológica (apenas se os anos não vierem em ordem).
+"""
+
+import numpy as np
+import pandas as pd
+
+from ons_dados.esquemas import ESQUEMAS
+from ons_dados.metricas import medir
+
+
+def mapear_categorias(serie, mapa):
+    """Aplica ``mapa`` às categorias de ``serie`` remapeando apenas os códigos inteiros.
+
+    O custo é o de uma indexação numpy sobre os códigos, e categorias distintas que passam a ter o mesmo
+    nome (ex.: "SUDESTE" e "Sudeste/Centro-Oeste") são unificadas.
+    """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype("category")
+    novas = [mapa.get(categoria, categoria) for categoria in serie.cat.categories]
+    unicas = pd.Index(novas).unique()
+    de_para = unicas.get_indexer(novas)
+    codigos = serie.cat.codes.to_numpy()
+    codigos = np.where(codigos >= 0, de_para[codigos], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=unicas), index=serie.index, name=serie.name)
+
+
+def _subsistemas(df, esquema):
+    df["nom_subsistema"] = mapear_categorias(df["nom_subsistema"], esquema.nomes_subsistema)
+    return df
+
+
+def _renomear(df, esquema):
+    df.rename(columns={esquema.coluna_data: "Data", "nom_subsistema": "Subsistema"}, inplace=True)
+    return df
+
+
+def _data(df, esquema):
+    df["Data"] = esquema.converter_data(df["Data"])
+    return df
+
+
+def _descartar_nulos(df, esquema):
+    if esquema.medidas_obrigatorias:
+        df.dropna(subset=list(esquema.medidas_obrigatorias), inplace=True)
+    return df
+
+
+def _ordenar(df, esquema):
+    # Os arquivos anuais já vêm em ordem cronológica; a ordenação completa só é feita se não vierem
+    if not df["Data"].is_monotonic_increasing:
+        df.sort_values(by="Data", kind="stable", inplace=True, ignore_index=True)
+    return df
+
+
+ETAPAS = [
+    ("subsistemas", _subsistemas),
+    ("renomear", _renomear),
+    ("converter_data", _data),
+    ("descartar_nulos", _descartar_nulos),
+    ("ordenar", _ordenar),
+]
+
+
+def tratar(df, dataset, metricas=None):
+    """Aplica as etapas de tratamento a ``df`` (alterando-o no lugar) e o retorna em ordem cronológica crescente.
+
+    Com ``metricas``, cada etapa gera um registro com o tempo gasto e as linhas na entrada e na saída.
+    """
+    esquema = ESQUEMAS[dataset]
+    for etapa, funcao in ETAPAS:
+        # A data em geral já vem convertida (e medida) por ler_csv; a etapa só roda, e é registrada, se não vier
+        if funcao is _data and pd.api.types.is_datetime64_any_dtype(df["Data"]):
+            continue
+        with medir(metricas, etapa, dataset, linhas_entrada=len(df)) as registro:
+            df = funcao(df, esquema)
+            registro["linhas_saida"] = len(df)
+    return df
@@ -0,0 +1,114 @@
+"""Carga das visões temporárias DW_* nas tabelas DWTABLE_* do hive_metastore.
+
+A carga incremental usa MERGE (Delta) com chave (id_subsistema, Data): apenas linhas novas ou com algum
+valor revisado pelo ONS são gravadas, e a definição da tabela (tipos e comentários) é preservada. Como cada
+MERGE gera uma nova versão da tabela Delta, os leitores continuam vendo a versão anterior durante a carga.
+"""
+
+from ons_dados.agregados import colunas_medias_moveis, colunas_mensal
+from ons_dados.consolidacao import colunas_diaria
+from ons_dados.esquemas import ESQUEMAS
+from ons_dados.metricas import colunas_metricas, medir
+from ons_dados.revisoes import colunas_alteracoes
+
+BANCO = "hive_metastore.sprintiii_isabelanatal"
+TABELAS = {"ena": "DWTABLE_ENA", "ear": "DWTABLE_EARM", "carga": "DWTABLE_CARGA", "cmo": "DWTABLE_CMO",
+           "carga_horaria": "DWTABLE_CARGA_HORARIA", "diaria": "DWTABLE_DIARIA", "medias_moveis": "DWTABLE_MEDIAS_MOVEIS", "mensal": "DWTABLE_MENSAL",
+           "alteracoes": "DWTABLE_ALTERACOES", "metricas": "DWTABLE_METRICAS"}
+VISOES = {"ena": "DW_ENA", "ear": "DW_EARM", "carga": "DW_CARGA", "cmo": "DW_CMO", "carga_horaria": "DW_CARGA_HORARIA",
+          "diaria": "DW_DIARIA",
+          "medias_moveis": "DW_MEDIAS_MOVEIS", "mensal": "DW_MENSAL", "alteracoes": "DW_ALTERACOES",
+          "metricas": "DW_METRICAS"}
+CHAVE = ("id_subsistema", "Data")
+
+
+def nome_tabela(dataset, banco=BANCO):
+    return banco + "." + TABELAS[dataset]
+
+
+def colunas_tabela(dataset):
+    """Colunas e tipos SQL da tabela DWTABLE_* de ``dataset`` (incluindo a tabela diária e os agregados)."""
+    if dataset == "diaria":
+        return colunas_diaria()
+    if dataset == "medias_moveis":
+        return colunas_medias_moveis()
+    if dataset == "mensal":
+        return colunas_mensal()
+    if dataset == "alteracoes":
+        return colunas_alteracoes()
+    if dataset == "metricas":
+        return colunas_metricas()
+    return ESQUEMAS[dataset].colunas_dw()
+
+
+def sql_criar_tabela(dataset, banco=BANCO):
+    """CREATE TABLE IF NOT EXISTS com as colunas da tabela do dataset (sem os comentários das definições do notebook).
+
+    A tabela é criada em Delta, o formato exigido pelo MERGE de ``carregar_upsert``.
+    """
+    colunas = ",\n".join(f" {coluna} {tipo}" for coluna, tipo in colunas_tabela(dataset))
+    return f"CREATE TABLE IF NOT EXISTS {nome_tabela(dataset, banco)}\n(\n{colunas}\n)\nUSING DELTA"
+
+
+def sql_origem(dataset, visao=None, dias_recarga=None, banco=BANCO):
+    """Consulta de origem com as colunas já convertidas para os tipos da tabela.
+
+    Com ``dias_recarga``, apenas as linhas a partir de (última data da tabela - ``dias_recarga``) são lidas.
+    """
+    visao = visao or VISOES[dataset]
+    colunas = ", ".join(f"CAST({coluna} AS {tipo}) AS {coluna}" for coluna, tipo in colunas_tabela(dataset))
+    consulta = f"SELECT {colunas} FROM {visao}"
+    if dias_recarga is not None:
+        # Com a tabela vazia, max(Data) é nulo e todas as linhas são carregadas
+        consulta += (f" WHERE CAST(Data AS DATE) >= date_sub(coalesce((SELECT max(Data) FROM {nome_tabela(dataset, banco)}),"
+                     f" DATE'1900-01-01'), {int(dias_recarga)})")
+    return consulta
+
+
+def sql_merge(dataset, visao=None, dias_recarga=None, banco=BANCO):
+    """Comando MERGE que insere as linhas novas e atualiza apenas as linhas cujos valores mudaram."""
+    colunas = [coluna for coluna, _tipo in colunas_tabela(dataset)]
+    valores = [coluna for coluna in colunas if coluna not in CHAVE]
+    condicao_chave = " AND ".join(f"t.{coluna} = s.{coluna}" for coluna in CHAVE)
+    # <=> compara tratando nulos como iguais, para não regravar linhas sem mudança
+    houve_mudanca = " OR ".join(f"NOT (t.{coluna} <=> s.{coluna})" for coluna in valores)
+    atribuicoes = ", ".join(f"t.{coluna} = s.{coluna}" for coluna in valores)
+    return (f"MERGE INTO {nome_tabela(dataset, banco)} t\n"
+            f"USING ({sql_origem(dataset, visao, dias_recarga, banco)}) s\n"
+            f"ON {condicao_chave}\n"
+            f"WHEN MATCHED AND ({houve_mudanca}) THEN UPDATE SET {atribuicoes}\n"
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(colunas)}) VALUES ({', '.join('s.' + c for c in colunas)})")
+
+
+def carregar_upsert(spark, dataset, visao=None, dias_recarga=None, banco=BANCO):
+    """Executa o MERGE de ``visao`` na tabela do dataset e retorna as métricas do Delta (linhas inseridas/atualizadas)."""
+    return spark.sql(sql_merge(dataset, visao, dias_recarga, banco)).collect()
+
+
+def carregar_completa(spark, dataset, visao=None, banco=BANCO):
+    """Regrava todo o histórico da tabela (INSERT OVERWRITE), mantendo a definição da tabela."""
+    spark.sql(f"INSERT OVERWRITE TABLE {nome_tabela(dataset, banco)} {sql_origem(dataset, visao, banco=banco)}")
+
+
+def inserir_tabela(spark, dataset, visao=None, banco=BANCO, metricas=None):
+    """Acrescenta as linhas de ``visao`` à tabela do dataset (INSERT INTO), para tabelas de registro como DWTABLE_ALTERACOES."""
+    with medir(metricas, "hive_insert", dataset):
+        spark.sql(f"INSERT INTO {nome_tabela(dataset, banco)} {sql_origem(dataset, visao, banco=banco)}")
+
+
+def carregar_tabela(spark, dataset, modo="upsert", dias_recarga=None, visao=None, banco=BANCO, metricas=None):
+    """Carrega ``visao`` na tabela do dataset no ``modo`` "upsert" (MERGE) ou "completa" (INSERT OVERWRITE).
+
+    Com ``metricas``, a carga gera um registro da etapa "hive_merge" (com as linhas afetadas informadas pelo
+    Delta) ou "hive_insert_overwrite".
+    """
+    if modo == "upsert":
+        with medir(metricas, "hive_merge", dataset) as registro:
+            resultado = carregar_upsert(spark, dataset, visao, dias_recarga, banco)
+            if resultado:
+                registro["linhas_saida"] = resultado[0].asDict().get("num_affected_rows")
+        return resultado
+    if modo == "completa":
+        with medir(metricas, "hive_insert_overwrite", dataset):
+            return carregar_completa(spark, dataset, visao, banco)
+    raise ValueError(f"Modo de carga desconhecido: {modo!r} (use 'upsert' ou 'completa')")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os testes importam ons_dados e benchmarks a partir da raiz do repositório, como os benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
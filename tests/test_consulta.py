@@ -0,0 +1,75 @@
+"""Consultas por HTTP: respostas e códigos de erro."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from ons_dados import consulta as modulo
+from ons_dados.armazenamento import gravar_parquet
+from ons_dados.consolidacao import colunas_diaria
+from ons_dados.consulta import Consulta, servidor_http
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    datas = pd.date_range("2023-01-01", "2023-01-31", freq="D")
+    tabela = pd.DataFrame({"id_subsistema": "S", "Subsistema": "Sul", "Data": datas})
+    for coluna, _tipo in colunas_diaria()[3:]:
+        tabela[coluna] = np.arange(len(datas), dtype="float64")
+    gravar_parquet(tabela, "diaria", str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def url(diretorio):
+    servidor = servidor_http(Consulta(diretorio, verificar_a_cada=0), porta=0)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as erro:
+        return erro.code, json.loads(erro.read())
+
+
+def test_dia(url):
+    status, corpo = _get(url + "/dia?subsistema=Sul&data=2023-01-03&colunas=val_cargaenergiamwmed")
+    assert status == 200
+    assert corpo == {"val_cargaenergiamwmed": 2.0}
+
+
+@pytest.mark.parametrize("caminho", ["/dia?data=2023-01-03", "/dia?subsistema=Sul", "/intervalo?inicio=2023-01-01",
+                                     "/dia?subsistema=Sul&data=ontem"])
+def test_parametro_ausente_ou_invalido(url, caminho):
+    status, corpo = _get(url + caminho)
+    assert status == 400
+    assert "erro" in corpo
+
+
+@pytest.mark.parametrize("caminho", ["/dia?subsistema=Sul&data=2024-01-01", "/rota"])
+def test_nao_encontrado(url, caminho):
+    assert _get(url + caminho)[0] == 404
+
+
+@pytest.mark.parametrize("erro, status", [(pa.ArrowInvalid("arquivo incompleto"), 503),
+                                          (FileNotFoundError("part-0.parquet"), 503),
+                                          (RuntimeError("falha"), 500)])
+def test_falha_na_leitura(url, monkeypatch, erro, status):
+    def falhar(*_argumentos, **_opcoes):
+        raise erro
+    monkeypatch.setattr(modulo, "ler_parquet", falhar)
+    resposta = _get(url + "/ultimo")
+    assert resposta[0] == status
+    assert "erro" in resposta[1]
@@ -0,0 +1,33 @@
+"""Atualização de ponta a ponta (download, tratamento, revisões, Parquet e agregados) com dados sintéticos."""
+
+import pytest
+
+from benchmarks.sintetico import gravar_anos
+from ons_dados.armazenamento import ler_parquet
+from ons_dados.pipeline import DATASETS, atualizar
+
+ANO_ZERO = 2020
+ANO_FIM = 2022
+
+
+@pytest.fixture(scope="module")
+def base_url(tmp_path_factory):
+    fontes = str(tmp_path_factory.mktemp("fontes"))
+    gravar_anos(fontes, DATASETS, ANO_ZERO, ANO_FIM)
+    return "file://" + fontes + "/"
+
+
+def test_atualizacao_completa_e_repetida(base_url, tmp_path):
+    diretorio = str(tmp_path)
+    primeira = atualizar(DATASETS, ANO_ZERO, ANO_FIM, diretorio=diretorio, base_url=base_url, processos=0)
+    dias = 366 + 365 + 365
+    assert len(primeira.tabela) == dias * 4
+    assert set(primeira.alteracoes["tipo"]) == {"inclusao"}
+    assert len(ler_parquet("alteracoes", diretorio)) == len(primeira.alteracoes)
+    assert len(ler_parquet("diaria", diretorio)) == dias * 4
+    assert not primeira.medias_moveis.empty and not primeira.mensal.empty
+
+    segunda = atualizar(DATASETS, ANO_ZERO, ANO_FIM, diretorio=diretorio, base_url=base_url, processos=0)
+    assert segunda.alteracoes.empty
+    assert {f"tratar_{dataset}" for dataset in DATASETS} <= segunda.puladas
+    assert len(ler_parquet("alteracoes", diretorio)) == len(primeira.alteracoes)
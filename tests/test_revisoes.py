@@ -0,0 +1,84 @@
+"""Hash das linhas e detecção das revisões do ONS entre duas atualizações."""
+
+import pandas as pd
+import pytest
+
+from benchmarks.sintetico import gerar_ano
+from ons_dados.download import ArquivoBaixado, ler_csv
+from ons_dados.esquemas import ESQUEMAS
+from ons_dados.revisoes import detectar_alteracoes, hash_linhas
+from ons_dados.tratamento import tratar
+
+DATASET = "ear"
+ANOS = (2021, 2022)
+
+
+def _serie(anos=ANOS, float32=False, engine="c"):
+    """Série de ``DATASET`` já tratada, lida como um arquivo do ONS."""
+    partes = []
+    for ano in anos:
+        conteudo = gerar_ano(DATASET, ano).to_csv(sep=";", index=False).encode("utf8")
+        partes.append(tratar(ler_csv(ArquivoBaixado(DATASET, ano, "", conteudo, 0.0, 1), float32, engine), DATASET))
+    return pd.concat(partes, ignore_index=True)
+
+
+def _linha(valor, tipo="float64"):
+    linha = pd.DataFrame({"id_subsistema": ["S"], "Subsistema": ["Sul"], "Data": pd.to_datetime(["2023-01-01"])})
+    for coluna in ESQUEMAS[DATASET].medidas:
+        linha[coluna] = pd.Series([valor], dtype=tipo)
+    return linha
+
+
+def test_hash_detecta_revisao_de_um_centesimo_em_valor_grande():
+    assert hash_linhas(_linha(204512.34), DATASET)[0] != hash_linhas(_linha(204512.35), DATASET)[0]
+
+
+def test_hash_independe_da_precisao_e_do_leitor():
+    referencia = hash_linhas(_serie(), DATASET)
+    for float32 in (False, True):
+        for engine in ("c", "pyarrow"):
+            assert (hash_linhas(_serie(float32=float32, engine=engine), DATASET) == referencia).all()
+    assert hash_linhas(_linha(204512.34, "float32"), DATASET)[0] == hash_linhas(_linha(204512.34), DATASET)[0]
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    return str(tmp_path)
+
+
+def test_primeira_execucao_registra_inclusoes(diretorio):
+    serie = _serie()
+    alteracoes = detectar_alteracoes(serie, DATASET, diretorio)
+    assert len(alteracoes) == len(serie)
+    assert set(alteracoes["tipo"]) == {"inclusao"}
+
+
+def test_execucao_sem_mudanca_nao_registra_nada(diretorio):
+    detectar_alteracoes(_serie(), DATASET, diretorio)
+    assert detectar_alteracoes(_serie(), DATASET, diretorio).empty
+
+
+def test_linha_revisada(diretorio):
+    detectar_alteracoes(_serie(), DATASET, diretorio)
+    serie = _serie()
+    revisada = serie.index[(serie["Subsistema"] == "Sul") & (serie["Data"] == "2022-03-01")]
+    serie.loc[revisada, "ear_verif_subsistema_mwmes"] += 0.01
+    alteracoes = detectar_alteracoes(serie, DATASET, diretorio)
+    assert alteracoes[["tipo", "Subsistema", "Data"]].values.tolist() == [
+        ["revisao", "Sul", pd.Timestamp("2022-03-01")]]
+
+
+def test_linha_excluida(diretorio):
+    detectar_alteracoes(_serie(), DATASET, diretorio)
+    serie = _serie()
+    serie = serie[~((serie["Subsistema"] == "Norte") & (serie["Data"] == "2021-07-15"))]
+    alteracoes = detectar_alteracoes(serie, DATASET, diretorio)
+    assert alteracoes[["tipo", "Subsistema", "Data"]].values.tolist() == [
+        ["exclusao", "Norte", pd.Timestamp("2021-07-15")]]
+
+
+def test_atualizacao_parcial_nao_exclui_os_demais_anos(diretorio):
+    detectar_alteracoes(_serie(), DATASET, diretorio)
+    assert detectar_alteracoes(_serie(anos=(2022,)), DATASET, diretorio, anos=[2022]).empty
+    # Os hashes de 2021 continuam gravados: uma nova execução completa também não acusa mudança
+    assert detectar_alteracoes(_serie(), DATASET, diretorio).empty
@@ -0,0 +1,77 @@
+"""Ingestão em blocos: a hora das séries horárias é preservada e o pico de memória não cresce com o histórico."""
+
+import multiprocessing
+
+import pytest
+
+from benchmarks.sintetico import gravar_anos
+from ons_dados.armazenamento import ler_parquet
+from ons_dados.metricas import memoria_mib, pico_memoria_mib, zerar_pico_memoria
+from ons_dados.streaming import blocos_dataset, gravar_blocos_parquet
+from ons_dados.warehouse import colunas_tabela
+
+ANO_ZERO = 2001
+DATASET = "carga_horaria"
+LINHAS_BLOCO = 20_000
+# Memória, acima da residente no início da ingestão, que os blocos podem ocupar (ordem de grandeza de alguns
+# blocos em pandas e em Arrow; a série completa de 12 anos ocupa bem mais)
+LIMITE_MIB = 64
+# Tolerância entre os picos de um histórico curto e de um longo
+VARIACAO_MIB = 10
+
+
+def _ingerir(fontes, destino, ano_fim, fila):
+    zerar_pico_memoria()
+    inicial = memoria_mib()
+    blocos = blocos_dataset(DATASET, ANO_ZERO, ano_fim, LINHAS_BLOCO, base_url="file://" + fontes + "/")
+    gravar_blocos_parquet(blocos, DATASET, destino)
+    fila.put((inicial, pico_memoria_mib()))
+
+
+def _medir(fontes, destino, ano_fim):
+    # spawn: o processo não herda a memória do pytest nem a dos arquivos sintéticos gerados
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_ingerir, args=(fontes, destino, ano_fim, fila))
+    processo.start()
+    resultado = fila.get(timeout=300)
+    processo.join()
+    return resultado
+
+
+@pytest.fixture(scope="module")
+def fontes(tmp_path_factory):
+    diretorio = str(tmp_path_factory.mktemp("fontes"))
+    gravar_anos(diretorio, [DATASET], ANO_ZERO, ANO_ZERO + 11, horas=24)
+    return diretorio
+
+
+def test_serie_horaria_mantem_a_hora_na_chave(fontes, tmp_path):
+    destino = str(tmp_path)
+    linhas = gravar_blocos_parquet(blocos_dataset(DATASET, ANO_ZERO, ANO_ZERO + 1, LINHAS_BLOCO,
+                                                  base_url="file://" + fontes + "/"), DATASET, destino)
+    df = ler_parquet(DATASET, destino)
+    assert len(df) == linhas == 2 * 365 * 24 * 4
+    assert df["Data"].dt.hour.nunique() == 24
+    assert not df.duplicated(["id_subsistema", "Data"]).any()
+    assert ("Data", "TIMESTAMP") in colunas_tabela(DATASET)
+
+
+def test_regravar_um_ano_substitui_as_particoes(fontes, tmp_path):
+    destino = str(tmp_path)
+    base_url = "file://" + fontes + "/"
+    gravar_blocos_parquet(blocos_dataset(DATASET, ANO_ZERO, ANO_ZERO + 1, LINHAS_BLOCO, base_url=base_url),
+                          DATASET, destino)
+    gravar_blocos_parquet(blocos_dataset(DATASET, ANO_ZERO + 1, ANO_ZERO + 1, LINHAS_BLOCO, base_url=base_url),
+                          DATASET, destino)
+    assert len(ler_parquet(DATASET, destino)) == 2 * 365 * 24 * 4
+
+
+def test_pico_de_memoria_limitado(fontes, tmp_path):
+    if not zerar_pico_memoria():
+        pytest.skip("o pico de memória só pode ser zerado no Linux")
+    inicial_curto, pico_curto = _medir(fontes, str(tmp_path / "curto"), ANO_ZERO + 1)
+    inicial_longo, pico_longo = _medir(fontes, str(tmp_path / "longo"), ANO_ZERO + 11)
+    assert pico_curto - inicial_curto < LIMITE_MIB
+    assert pico_longo - inicial_longo < LIMITE_MIB
+    assert pico_longo - pico_curto < VARIACAO_MIB
@@ -0,0 +1,68 @@
+"""Comandos SQL da carga no Hive e, com pyspark e delta-spark instalados, o MERGE em uma sessão local."""
+
+import pandas as pd
+import pytest
+
+from ons_dados.pipeline import carregar_visao
+from ons_dados.warehouse import nome_tabela, sql_criar_tabela, sql_merge
+
+BANCO = "ons_dados_teste"
+
+
+def test_tabela_criada_em_delta():
+    assert sql_criar_tabela("ena", BANCO).endswith("USING DELTA")
+
+
+def test_merge_sem_janela_le_todo_o_historico():
+    assert "WHERE" not in sql_merge("ena", banco=BANCO)
+    assert "date_sub" in sql_merge("ena", dias_recarga=30, banco=BANCO)
+
+
+@pytest.fixture(scope="module")
+def spark(tmp_path_factory):
+    pytest.importorskip("pyspark")
+    delta = pytest.importorskip("delta")
+    from pyspark.sql import SparkSession
+    construtor = (SparkSession.builder.master("local[1]").appName("ons_dados_testes")
+                  .config("spark.sql.extensions", "io.delta.sql.DeltaSparkSessionExtension")
+                  .config("spark.sql.catalog.spark_catalog", "org.apache.spark.sql.delta.catalog.DeltaCatalog")
+                  .config("spark.sql.warehouse.dir", str(tmp_path_factory.mktemp("warehouse")))
+                  .config("spark.sql.shuffle.partitions", "1")
+                  .config("spark.ui.enabled", "false"))
+    sessao = delta.configure_spark_with_delta_pip(construtor).getOrCreate()
+    sessao.sql(f"CREATE DATABASE IF NOT EXISTS {BANCO}")
+    yield sessao
+    sessao.sql(f"DROP DATABASE IF EXISTS {BANCO} CASCADE")
+    sessao.stop()
+
+
+def _ena(dias, valor=1.0):
+    datas = pd.date_range("2023-01-01", periods=dias, freq="D")
+    return pd.DataFrame({
+        "id_subsistema": "S", "Subsistema": "Sul", "Data": datas,
+        "ena_bruta_regiao_mwmed": valor, "ena_bruta_regiao_percentualmlt": valor,
+        "ena_armazenavel_regiao_mwmed": valor, "ena_armazenavel_regiao_percentualmlt": valor,
+    })
+
+
+def _valor(spark, data):
+    return spark.sql(f"SELECT ena_bruta_regiao_mwmed FROM {nome_tabela('ena', BANCO)} "
+                     f"WHERE Data = DATE'{data}'").collect()[0][0]
+
+
+def test_merge_grava_revisoes_antigas(spark):
+    spark.sql(f"DROP TABLE IF EXISTS {nome_tabela('ena', BANCO)}")
+    carregar_visao(spark, "ena", _ena(120), banco=BANCO)
+    assert spark.sql(f"SELECT count(*) FROM {nome_tabela('ena', BANCO)}").collect()[0][0] == 120
+
+    # Revisão de um dia antigo e um dia novo: sem janela, ambos chegam à tabela
+    revisado = _ena(121)
+    revisado.loc[revisado["Data"] == "2023-01-10", "ena_bruta_regiao_mwmed"] = 2.0
+    carregar_visao(spark, "ena", revisado, banco=BANCO)
+    assert _valor(spark, "2023-01-10") == 2.0
+    assert spark.sql(f"SELECT count(*) FROM {nome_tabela('ena', BANCO)}").collect()[0][0] == 121
+
+    # Com dias_recarga, revisões anteriores à janela são ignoradas
+    revisado.loc[revisado["Data"] == "2023-01-10", "ena_bruta_regiao_mwmed"] = 3.0
+    carregar_visao(spark, "ena", revisado, dias_recarga=30, banco=BANCO)
+    assert _valor(spark, "2023-01-10") == 2.0